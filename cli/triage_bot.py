@@ -7,23 +7,63 @@ and gather security metrics.
 """
 
 import os
+import sys
 import typer
 import json
 import asyncio
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple, TYPE_CHECKING
+from dataclasses import dataclass
 from rich.console import Console
 from rich.panel import Panel
-from rich.markdown import Markdown
-from rich.prompt import Prompt
-from rich.table import Table
-import subprocess
-import requests
+from rich.style import Style
+import functools
+import time
+from pathlib import Path
 from datetime import datetime
-import dotenv
-from openai import AsyncOpenAI
+import contextlib
+import base64
+import hashlib
+import re
+import importlib.util
+from collections import deque
 
-# Load environment variables
-dotenv.load_dotenv()
+# fcntl is POSIX-only; without it token acquisition isn't serialized across processes
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Heavier dependencies (openai, httpx, msal, prompt_toolkit and most of rich) are imported where they
+# are used so that commands which don't need them start faster
+if TYPE_CHECKING:
+    import httpx
+    import msal
+    from openai import AsyncOpenAI, RateLimitError
+    from rich.table import Table
+    from prompt_toolkit import PromptSession
+
+# orjson is optional; it parses and serializes JSON considerably faster than json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def find_env_file() -> Optional[Path]:
+    """Find the nearest .env file in this script's directory or one of its parents."""
+    directory = Path(__file__).resolve().parent
+    for candidate in (directory, *directory.parents):
+        env_file = candidate / ".env"
+        if env_file.is_file():
+            return env_file
+    return None
+
+# Load environment variables, unless the environment is already fully configured.
+# python-dotenv is only imported when there is a .env file to parse.
+if not os.environ.get("TRIAGE_BOT_SKIP_DOTENV"):
+    ENV_FILE = find_env_file()
+    if ENV_FILE:
+        import dotenv
+        dotenv.load_dotenv(ENV_FILE)
 
 # Initialize Typer app and Rich console
 app = typer.Typer(help="Azure Security Incident Triage CLI")
@@ -32,98 +72,505 @@ console = Console()
 # Global variables
 user_info = None
 azure_token = None
-FUNCTION_APP_URL = os.getenv("FUNCTION_APP_URL", "")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-OPENAI_API_VERSION = os.getenv("OPENAI_API_VERSION", "2023-05-15")
-OPENAI_ENDPOINT = os.getenv("OPENAI_ENDPOINT", "")
-OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4")
-USE_AZURE_OPENAI = os.getenv("USE_AZURE_OPENAI", "false").lower() == "true"
-AZURE_OPENAI_DEPLOYMENT = os.getenv("AZURE_OPENAI_DEPLOYMENT", "")
-
-# Initialize OpenAI client based on configuration
-if USE_AZURE_OPENAI:
-    # Azure OpenAI configuration
-    client = AsyncOpenAI(
-        api_key=OPENAI_API_KEY,
-        api_version=OPENAI_API_VERSION,
-        azure_endpoint=OPENAI_ENDPOINT,
-    )
-else:
-    # Standard OpenAI configuration
-    client = AsyncOpenAI(
-        api_key=OPENAI_API_KEY,
-    )
 
-async def chat_with_model(messages):
-    """Send messages to the OpenAI chat model and get a response."""
-    try:
-        if USE_AZURE_OPENAI:
-            response = await client.chat.completions.create(
-                model=AZURE_OPENAI_DEPLOYMENT,
-                messages=messages,
-                temperature=0.7,
+@dataclass(frozen=True, slots=True)
+class Config:
+    """CLI configuration, read from the environment once at startup."""
+    function_app_url: str
+    function_app_resource: str
+    function_app_scope: str
+    client_id: str
+    tenant_id: str
+    openai_api_key: str
+    openai_api_version: str
+    openai_endpoint: str
+    use_azure_openai: bool
+    openai_model: str  # Azure OpenAI deployment name when use_azure_openai is set
+    max_tokens: int
+    context_window: int
+    max_concurrent: int
+    max_rpm: int
+    chat_history_turns: int
+    
+    @classmethod
+    def from_env(cls) -> "Config":
+        """Build the configuration from environment variables."""
+        use_azure_openai = os.getenv("USE_AZURE_OPENAI", "false").lower() == "true"
+        function_app_resource = os.getenv("FUNCTION_APP_RESOURCE", "api://your-function-app-id")
+        return cls(
+            function_app_url=os.getenv("FUNCTION_APP_URL", ""),
+            function_app_resource=function_app_resource,
+            # Add basic scope for read access if no specific scope provided
+            function_app_scope=os.getenv("FUNCTION_APP_SCOPE", f"{function_app_resource}/incidents.read"),
+            client_id=os.getenv("AZURE_CLIENT_ID", ""),
+            tenant_id=os.getenv("AZURE_TENANT_ID", ""),
+            openai_api_key=os.getenv("OPENAI_API_KEY", ""),
+            openai_api_version=os.getenv("OPENAI_API_VERSION", "2023-05-15"),
+            openai_endpoint=os.getenv("OPENAI_ENDPOINT", ""),
+            use_azure_openai=use_azure_openai,
+            openai_model=(os.getenv("AZURE_OPENAI_DEPLOYMENT", "") if use_azure_openai
+                          else os.getenv("OPENAI_MODEL", "gpt-4")),
+            max_tokens=int(os.getenv("OPENAI_MAX_TOKENS", "512")),
+            context_window=int(os.getenv("OPENAI_CONTEXT_WINDOW", "8192")),
+            max_concurrent=int(os.getenv("OPENAI_MAX_CONCURRENT", "5")),
+            max_rpm=int(os.getenv("OPENAI_MAX_RPM", "60")),
+            # At least one turn, so the current message is always sent (and history[-0:] can't
+            # send, or del history[:-0] keep, the whole history)
+            chat_history_turns=max(int(os.getenv("CHAT_HISTORY_TURNS", "6")), 1),
+        )
+
+CFG = Config.from_env()
+
+OPENAI_TIMEOUT = 30.0
+OPENAI_MAX_RETRIES = 3
+MESSAGE_TOKEN_OVERHEAD = 4  # tokens the chat format adds around each message
+
+# Incident fields shown by list-incidents, in column order (tactics are appended separately)
+INCIDENT_LIST_FIELDS = ("id", "title", "severity", "status", "createdTime")
+
+# These are more realistic Azure Monitor/Defender metrics that security analysts actually use
+SAMPLE_METRICS = [
+    {
+        "name": "Total Active Alerts",
+        "value": 47,
+        "change": "+12% from last week",
+        "provider": "Microsoft.Security/alerts"
+    },
+    {
+        "name": "Failed Sign-in Attempts",
+        "value": 216,
+        "change": "+28% from baseline", 
+        "provider": "Microsoft.Entra/signInLogs"
+    },
+    {
+        "name": "Suspicious Resource Deployments",
+        "value": 5,
+        "change": "New detection",
+        "provider": "Microsoft.Resources/deployments"
+    },
+    {
+        "name": "Endpoints with Malware Detections",
+        "value": 3,
+        "change": "-1 from last report",
+        "provider": "Microsoft.Defender/endpoints"
+    },
+    {
+        "name": "Security Score",
+        "value": 72,
+        "change": "+4 points",
+        "provider": "Microsoft.Security/secureScores"
+    }
+]
+
+# Trend styles keyed by the leading character of a metric's change; anything else is yellow
+CHANGE_STYLES = {"+": "green", "-": "red"}
+
+def format_change(change: str) -> str:
+    """Wrap a metric's change description in its trend style markup."""
+    style = CHANGE_STYLES.get(change[:1], "yellow")
+    return f"[{style}]{change}[/{style}]"
+
+# Rows for the metrics table, formatted once since the sample metrics are static
+SAMPLE_METRIC_ROWS = [
+    (metric["name"], str(metric["value"]), format_change(metric["change"]), metric["provider"])
+    for metric in SAMPLE_METRICS
+]
+
+# Table column layouts as (header, style, add_column options). Styles are parsed once
+# here rather than from markup strings each time a table is built.
+INCIDENT_DETAIL_COLUMNS = (
+    ("Property", Style.parse("cyan"), {}),
+    ("Value", Style.parse("green"), {"no_wrap": False, "overflow": "fold"}),
+)
+INCIDENT_LIST_COLUMNS = (
+    ("Incident ID", Style.parse("cyan"), {}),
+    ("Title", Style.parse("green"), {}),
+    ("Severity", Style.parse("red"), {}),
+    ("Status", Style.parse("yellow"), {}),
+    ("Created", Style.parse("blue"), {}),
+    ("Tactics", Style.parse("magenta"), {}),
+)
+METRICS_COLUMNS = (
+    ("Metric Name", Style.parse("cyan"), {}),
+    ("Value", Style.parse("green"), {}),
+    ("Trend", Style.parse("yellow"), {}),
+    ("Resource Provider", Style.parse("magenta"), {}),
+)
+
+# System preamble sent at the start of every chat request
+SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are an Azure Security Incident Triage Bot. Your job is to help security analysts investigate and triage incidents. "
+               "You can provide guidance, answer questions about Azure security, and help resolve incidents. "
+               "Be concise, accurate, and helpful."
+}
+
+# MSAL token cache, persisted so back-to-back CLI invocations can acquire tokens silently
+MSAL_CACHE_FILE = Path("~/.cache/triage_bot/msal.bin").expanduser()
+# Held while tokens are acquired so concurrent CLI processes don't refresh at the same time
+TOKEN_LOCK_FILE = MSAL_CACHE_FILE.with_name("token.lock")
+# Input history for the interactive chat prompt
+CHAT_HISTORY_FILE = MSAL_CACHE_FILE.with_name("chat_history")
+_MSAL_APP: Optional["msal.PublicClientApplication"] = None
+_MSAL_CACHE: Optional["msal.SerializableTokenCache"] = None
+
+# Access tokens already acquired by this process, keyed by scopes: (access_token, expires_at_epoch).
+# Lets repeated lookups skip the token lock and the reload of the MSAL cache file.
+_TOKEN_CACHE: Dict[Tuple[str, ...], Tuple[str, float]] = {}
+TOKEN_REFRESH_MARGIN = 60  # seconds before expiry at which a cached token is refreshed
+SESSION_VALIDATION_MARGIN = 300  # tokens closer than this to expiry are re-validated with the MCP server
+# A successful validation with the MCP server is trusted for SESSION_VALIDATION_TTL seconds.
+# _LAST_VALIDATED lives only in this process, so it only spares repeated session checks within
+# one long-running command (e.g. chat turns); each new CLI command starts without it.
+SESSION_VALIDATION_TTL = 300
+_LAST_VALIDATED: Optional[float] = None  # time.monotonic() of the last successful validation; reset on a 401
+
+# Error returned by call_mcp_function when no token could be acquired without user interaction
+AUTH_REQUIRED_ERROR = "Authentication required"
+
+# Short-lived cache of responses from read-only MCP endpoints: key -> (expires_at, response)
+CACHEABLE_ENDPOINTS = frozenset(["incidents/get", "incidents/batch-get", "metrics/dashboard"])
+MCP_CACHE_TTL = 30  # seconds
+MCP_CACHE_MAX_SIZE = 128
+_MCP_CACHE: Dict[Tuple[str, bytes], Tuple[float, dict]] = {}
+
+# Shared HTTP/2 client for MCP server calls, created lazily on the running event loop
+# so one multiplexed connection is reused for the lifetime of the process
+_HTTP: Optional["httpx.AsyncClient"] = None
+
+# OpenAI client, created on first use by _get_openai_client
+_OPENAI_CLIENT: Optional["AsyncOpenAI"] = None
+
+def _get_openai_client() -> "AsyncOpenAI":
+    """Get or create the OpenAI client based on configuration."""
+    global _OPENAI_CLIENT
+    if _OPENAI_CLIENT is None:
+        import httpx
+        from openai import AsyncOpenAI
+        # The SDK sends its own timeout with every request, overriding the http_client's,
+        # so the same Timeout is passed to both
+        timeout = httpx.Timeout(OPENAI_TIMEOUT, connect=5.0)
+        # A tuned HTTP/2 client with a larger pool than the SDK default, so streamed
+        # completions and any parallel requests share connections
+        http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20)
+        )
+        if CFG.use_azure_openai:
+            # Azure OpenAI configuration
+            _OPENAI_CLIENT = AsyncOpenAI(
+                api_key=CFG.openai_api_key,
+                api_version=CFG.openai_api_version,
+                azure_endpoint=CFG.openai_endpoint,
+                http_client=http_client,
+                timeout=timeout,
+                max_retries=OPENAI_MAX_RETRIES,
             )
         else:
-            response = await client.chat.completions.create(
-                model=OPENAI_MODEL,
-                messages=messages,
-                temperature=0.7,
+            # Standard OpenAI configuration
+            _OPENAI_CLIENT = AsyncOpenAI(
+                api_key=CFG.openai_api_key,
+                http_client=http_client,
+                timeout=timeout,
+                max_retries=OPENAI_MAX_RETRIES,
             )
-        return response.choices[0].message.content
+    return _OPENAI_CLIENT
+
+# Client-side rate limiting for OpenAI requests: bounded concurrency plus a
+# sliding one-minute window of request timestamps
+_RATE_SEM = asyncio.Semaphore(CFG.max_concurrent)
+_REQUEST_TIMES = deque()
+RATE_LIMIT_BACKOFF = [1, 2, 4]  # seconds to wait after successive 429 responses
+STREAM_UPDATE_INTERVAL = 0.05  # minimum seconds between re-renders of a streaming response
+
+async def _wait_for_rate_limit():
+    """Sleep until another request fits in the requests-per-minute window."""
+    while True:
+        now = time.monotonic()
+        while _REQUEST_TIMES and now - _REQUEST_TIMES[0] >= 60:
+            _REQUEST_TIMES.popleft()
+        if len(_REQUEST_TIMES) < CFG.max_rpm:
+            _REQUEST_TIMES.append(now)
+            return
+        await asyncio.sleep(60 - (now - _REQUEST_TIMES[0]))
+
+def _retry_after(error: "RateLimitError", default: float) -> float:
+    """Get the server-suggested delay from a rate limit error, if any."""
+    try:
+        return float(error.response.headers.get("retry-after", default))
+    except (AttributeError, TypeError, ValueError):
+        return default
+
+@functools.lru_cache(maxsize=1)
+def _get_encoding():
+    """Get the tiktoken encoding for the configured model."""
+    import tiktoken
+    try:
+        return tiktoken.encoding_for_model(CFG.openai_model)
+    except KeyError:
+        # Azure OpenAI deployment names aren't model names
+        return tiktoken.get_encoding("cl100k_base")
+
+def trim_to_token_budget(messages):
+    """
+    Drop the oldest user/assistant messages until the prompt plus the completion
+    budget fits in the model's context window. System messages and the latest
+    message are always kept.
+    """
+    encoding = _get_encoding()
+    messages = list(messages)
+    counts = [len(encoding.encode(m["content"])) + MESSAGE_TOKEN_OVERHEAD for m in messages]
+    total = sum(counts)
+    trimmed = 0
+    while total + CFG.max_tokens > CFG.context_window:
+        droppable = [i for i, m in enumerate(messages[:-1]) if m["role"] != "system"]
+        if not droppable:
+            break
+        # Drop the oldest exchange, removing the later index first so the earlier one stays valid
+        for i in reversed(droppable[:2]):
+            total -= counts.pop(i)
+            messages.pop(i)
+        trimmed += 1
+    if trimmed:
+        console.print(f"[dim]Trimmed {trimmed} old turn(s) to fit the context window[/dim]")
+    return messages
+
+async def chat_with_model(messages, on_delta=None):
+    """
+    Send messages to the OpenAI chat model and get a response.
+    The response is streamed; on_delta, if given, is called with the text received so far,
+    at most once every STREAM_UPDATE_INTERVAL seconds.
+    """
+    try:
+        from openai import RateLimitError
+        client = _get_openai_client()
+        messages = trim_to_token_budget(messages)
+        async with _RATE_SEM:
+            for backoff in RATE_LIMIT_BACKOFF + [None]:
+                await _wait_for_rate_limit()
+                try:
+                    stream = await client.chat.completions.create(
+                        model=CFG.openai_model,
+                        messages=messages,
+                        temperature=0.7,
+                        max_tokens=CFG.max_tokens,
+                        stream=True,
+                    )
+                    parts = []
+                    last_update = 0.0
+                    async for chunk in stream:
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            parts.append(delta)
+                            now = time.monotonic()
+                            if on_delta and now - last_update >= STREAM_UPDATE_INTERVAL:
+                                last_update = now
+                                on_delta("".join(parts))
+                    return "".join(parts)
+                except RateLimitError as e:
+                    if backoff is None:
+                        raise
+                    delay = max(backoff, _retry_after(e, backoff))
+                    console.print(f"[dim]Rate limited by OpenAI, retrying in {delay:g}s...[/dim]")
+                    await asyncio.sleep(delay)
     except Exception as e:
         console.print(f"[bold red]Error communicating with OpenAI API: {str(e)}[/bold red]")
         return "I encountered an error processing your request."
 
-def check_azure_cli_login():
-    """Check if user is logged in to Azure CLI."""
+def json_loads(data):
+    """Parse JSON text or bytes, using orjson when it is available."""
+    return orjson.loads(data) if orjson else json.loads(data)
+
+def json_dumps_compact(obj) -> str:
+    """Serialize to JSON without whitespace, using orjson when it is available."""
+    if orjson:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(",", ":"))
+
+def json_dumps_request(obj) -> bytes:
+    """Serialize a request body to compact JSON bytes with sorted keys, using orjson when it is available."""
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, sort_keys=True, separators=(",", ":")).encode()
+
+def json_dumps_pretty(obj) -> str:
+    """Serialize to JSON indented by two spaces, using orjson when it is available."""
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(obj, indent=2)
+
+def _get_msal_app() -> "msal.PublicClientApplication":
+    """Get or create the MSAL public client application backed by the persisted token cache."""
+    global _MSAL_APP, _MSAL_CACHE
+    if _MSAL_APP is None:
+        import msal
+        _MSAL_CACHE = msal.SerializableTokenCache()
+        _load_msal_cache()
+        _MSAL_APP = msal.PublicClientApplication(
+            client_id=CFG.client_id,
+            authority=f"https://login.microsoftonline.com/{CFG.tenant_id or 'organizations'}",
+            token_cache=_MSAL_CACHE
+        )
+    return _MSAL_APP
+
+def _load_msal_cache():
+    """Replace the in-memory MSAL token cache with the persisted one, if any."""
     try:
-        result = subprocess.run(["az", "account", "show"], capture_output=True, text=True)
-        if result.returncode == 0:
-            return json.loads(result.stdout)
-        return None
+        _MSAL_CACHE.deserialize(MSAL_CACHE_FILE.read_text())
+    except OSError:
+        pass
+    except ValueError:
+        # A corrupt cache file just means signing in again; it is overwritten on the next save
+        console.print("[dim]Ignoring unreadable token cache[/dim]")
+
+def _save_msal_cache():
+    """
+    Persist the MSAL token cache if it changed, readable only by the current user.
+    It is written to a temporary file and renamed into place, so an interrupted
+    write can't leave a truncated cache behind.
+    """
+    if _MSAL_CACHE is None or not _MSAL_CACHE.has_state_changed:
+        return
+    tmp_file = MSAL_CACHE_FILE.with_name(MSAL_CACHE_FILE.name + ".tmp")
+    try:
+        MSAL_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(_MSAL_CACHE.serialize())
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_file, 0o600)
+        os.replace(tmp_file, MSAL_CACHE_FILE)
+        _MSAL_CACHE.has_state_changed = False
+    except OSError as e:
+        console.print(f"[dim]Could not persist token cache: {str(e)}[/dim]")
+
+def _merge_msal_cache(before: dict):
+    """
+    Merge the in-memory MSAL token cache into the persisted one, keeping only the entries
+    that changed since the `before` snapshot (a parsed serialize()). Entries another process
+    refreshed and saved in the meantime are kept. Call while holding the token lock.
+    """
+    after = json_loads(_MSAL_CACHE.serialize())
+    try:
+        merged = json_loads(MSAL_CACHE_FILE.read_bytes())
+    except (OSError, ValueError):
+        merged = {}
+    # The cache is a dict of sections (AccessToken, RefreshToken, Account, ...) of key -> entry
+    for section in before.keys() | after.keys():
+        old, new = before.get(section, {}), after.get(section, {})
+        target = merged.setdefault(section, {})
+        for key in old.keys() - new.keys():
+            target.pop(key, None)
+        target.update((key, entry) for key, entry in new.items() if old.get(key) != entry)
+    _MSAL_CACHE.deserialize(json_dumps_compact(merged))
+    _MSAL_CACHE.has_state_changed = True
+
+@contextlib.contextmanager
+def _token_lock():
+    """Hold an exclusive cross-process lock on the token cache (a no-op where fcntl is unavailable)."""
+    TOKEN_LOCK_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(TOKEN_LOCK_FILE, "w") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _acquire_token(interactive: bool = False, force_refresh: bool = False) -> Optional[dict]:
+    """
+    Acquire a token for the Function App.
+    Silent acquisition holds the token lock and reloads the cache first, so a token
+    refreshed by another process is reused. Interactive sign-in runs outside the lock,
+    so other CLI processes aren't blocked for the whole browser flow; its new tokens are
+    then merged into the persisted cache under the lock.
+    """
+    app = _get_msal_app()
+    if interactive:
+        before = json_loads(_MSAL_CACHE.serialize())
+        try:
+            return app.acquire_token_interactive(get_token_scopes())
+        finally:
+            with _token_lock():
+                _merge_msal_cache(before)
+                _save_msal_cache()
+    with _token_lock():
+        _load_msal_cache()
+        try:
+            accounts = app.get_accounts()
+            if not accounts:
+                return None
+            return app.acquire_token_silent(get_token_scopes(), account=accounts[0], force_refresh=force_refresh)
+        finally:
+            _save_msal_cache()
+
+def get_token_scopes() -> List[str]:
+    """Get the scopes to request for the Function App."""
+    # Determine if we should use resource or scope approach
+    if CFG.function_app_resource.startswith("api://"):
+        # Use scope approach for App Registration custom scopes
+        return CFG.function_app_scope.split()
+    # Fall back to resource approach (legacy)
+    return [f"{CFG.function_app_resource}/.default"]
+
+def _account_info(account: dict) -> dict:
+    """Describe an MSAL account in the shape the CLI reports for the signed-in user."""
+    return {
+        "user": {"name": account.get("username"), "type": "user"},
+        "tenantId": account.get("realm"),
+        "homeAccountId": account.get("home_account_id")
+    }
+
+async def check_azure_login():
+    """Check if a user is signed in, based on the accounts in the MSAL token cache."""
+    try:
+        accounts = _get_msal_app().get_accounts()
+        return _account_info(accounts[0]) if accounts else None
     except Exception as e:
-        console.print(f"[bold red]Error checking Azure CLI login: {str(e)}[/bold red]")
+        console.print(f"[bold red]Error checking Azure login: {str(e)}[/bold red]")
         return None
 
-def get_azure_token():
-    """Get an access token from Azure CLI for the Function App with proper scopes."""
+def _remember_token(cache_key: Tuple[str, ...], result: dict):
+    """Keep an MSAL token result in the in-process token cache."""
+    _TOKEN_CACHE[cache_key] = (result["access_token"], time.time() + float(result.get("expires_in", 0)))
+
+async def get_azure_token(force_refresh: bool = False):
+    """
+    Get an access token for the Function App with proper scopes, without user interaction.
+    MSAL serves cached tokens until they near expiry and refreshes them with the
+    cached refresh token; force_refresh skips the cached access token.
+    """
     try:
-        # Get the Function App URI and client ID from environment
-        function_app_resource = os.getenv("FUNCTION_APP_RESOURCE", "api://your-function-app-id")
-        client_id = os.getenv("AZURE_CLIENT_ID", "")
-        
-        # Determine if we should use resource or scope approach
-        if function_app_resource.startswith("api://"):
-            # Use scope approach for App Registration custom scopes
-            # Add basic scope for read access if no specific scope provided
-            scope = os.getenv("FUNCTION_APP_SCOPE", f"{function_app_resource}/incidents.read")
-            result = subprocess.run(
-                ["az", "account", "get-access-token", "--scope", scope, "--client-id", client_id],
-                capture_output=True,
-                text=True
-            )
+        cache_key = tuple(get_token_scopes())
+        if force_refresh:
+            _TOKEN_CACHE.pop(cache_key, None)
         else:
-            # Fall back to resource approach (legacy)
-            result = subprocess.run(
-                ["az", "account", "get-access-token", "--resource", function_app_resource],
-                capture_output=True,
-                text=True
-            )
-        if result.returncode == 0:
-            token_info = json.loads(result.stdout)
-            return token_info.get("accessToken")
+            cached = _TOKEN_CACHE.get(cache_key)
+            if cached and cached[1] - time.time() > TOKEN_REFRESH_MARGIN:
+                return cached[0]
+        
+        result = await asyncio.to_thread(_acquire_token, force_refresh=force_refresh)
+        if result and "access_token" in result:
+            _remember_token(cache_key, result)
+            return result["access_token"]
         return None
     except Exception as e:
         console.print(f"[bold red]Error getting Azure access token: {str(e)}[/bold red]")
         return None
 
-def login_to_azure():
-    """Login to Azure using Azure CLI."""
+async def login_to_azure():
+    """Login to Azure interactively in the browser using MSAL."""
     try:
         console.print("[yellow]Logging in to Azure...[/yellow]")
-        subprocess.run(["az", "login"], check=True)
-        user_info = check_azure_cli_login()
-        token = get_azure_token()
+        result = await asyncio.to_thread(_acquire_token, interactive=True)
+        if "access_token" not in result:
+            raise RuntimeError(result.get("error_description") or result.get("error", "no access token returned"))
+        token = result["access_token"]
+        _remember_token(tuple(get_token_scopes()), result)
+        user_info = await check_azure_login()
         
         if user_info and token:
             console.print("[green]Successfully logged in to Azure[/green]")
@@ -135,64 +582,268 @@ def login_to_azure():
         console.print(f"[bold red]Error logging in to Azure: {str(e)}[/bold red]")
         return None, None
 
-def call_mcp_function(endpoint: str, data: dict):
+def _accept_encoding() -> str:
+    """Get the Accept-Encoding to send, offering brotli only when httpx can decode it."""
+    # httpx decodes br responses with brotli or brotlicffi; checked without importing either
+    if importlib.util.find_spec("brotli") or importlib.util.find_spec("brotlicffi"):
+        return "br, gzip"
+    return "gzip"
+
+def _get_session() -> "httpx.AsyncClient":
+    """Get or create the shared HTTP/2 client for MCP server calls."""
+    global _HTTP
+    import httpx
+    if _HTTP is None or _HTTP.is_closed:
+        # Incident JSON compresses well, so always ask for compressed responses
+        _HTTP = httpx.AsyncClient(
+            # The transport retries failed connection attempts, so a dropped
+            # keep-alive connection doesn't fail the call
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=2,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+            ),
+            timeout=30.0,
+            headers={"Content-Type": "application/json", "Accept-Encoding": _accept_encoding()}
+        )
+    return _HTTP
+
+async def _close_clients():
+    """Close the shared MCP and OpenAI HTTP clients if they were created."""
+    global _HTTP, _OPENAI_CLIENT
+    if _HTTP is not None and not _HTTP.is_closed:
+        await _HTTP.aclose()
+    _HTTP = None
+    if _OPENAI_CLIENT is not None:
+        await _OPENAI_CLIENT.close()
+    _OPENAI_CLIENT = None
+
+def _mcp_cache_key(endpoint: str, body: bytes) -> Tuple[str, bytes]:
+    """Build the response cache key for an MCP call from its endpoint and serialized request body."""
+    return endpoint, hashlib.blake2b(body, digest_size=8).digest()
+
+def _get_cached_response(key: Tuple[str, bytes]) -> Optional[dict]:
+    """Get a cached MCP response if it hasn't expired."""
+    entry = _MCP_CACHE.get(key)
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+    _MCP_CACHE.pop(key, None)
+    return None
+
+def _cache_response(key: Tuple[str, bytes], response: dict):
+    """Cache an MCP response, evicting the oldest entry when the cache is full."""
+    if len(_MCP_CACHE) >= MCP_CACHE_MAX_SIZE:
+        _MCP_CACHE.pop(next(iter(_MCP_CACHE)))
+    _MCP_CACHE[key] = (time.monotonic() + MCP_CACHE_TTL, response)
+
+def install_uvloop():
+    """Use uvloop for asyncio event loops on POSIX platforms where it is installed."""
+    if sys.platform == "win32":
+        return
+    try:
+        import uvloop
+    except ImportError:
+        return
+    uvloop.install()
+
+def run_async(func):
+    """Run an async Typer command to completion on a fresh (uvloop, where available) event loop."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # Installed here rather than at startup so commands without I/O don't import uvloop
+        install_uvloop()
+        async def runner():
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                await _close_clients()
+        return asyncio.run(runner())
+    return wrapper
+
+async def call_mcp_function(endpoint: str, data: dict):
     """Call the MCP server Azure Function."""
-    global azure_token
+    global azure_token, _LAST_VALIDATED
+    import httpx
     
     try:
         # Check if we have a valid token
         if not azure_token:
             # Try to get a new token
-            azure_token = get_azure_token()
+            azure_token = await get_azure_token()
             if not azure_token:
                 console.print("[bold red]No valid Azure token. Please log in first.[/bold red]")
-                return {"error": "Authentication required"}
-                
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {azure_token}"
-        }
+                return {"error": AUTH_REQUIRED_ERROR}
+        
+        # The body is serialized once and used for both the cache key and the request
+        body = json_dumps_request(data)
+        cache_key = _mcp_cache_key(endpoint, body) if endpoint in CACHEABLE_ENDPOINTS else None
+        if cache_key:
+            cached = _get_cached_response(cache_key)
+            if cached is not None:
+                return cached
         
-        response = requests.post(f"{FUNCTION_APP_URL}/{endpoint}", json=data, headers=headers)
+        session = _get_session()
+        url = f"{CFG.function_app_url}/{endpoint}"
+        response = await session.post(url, content=body, headers={"Authorization": f"Bearer {azure_token}"})
         
         # Check if unauthorized (token expired)
         if response.status_code == 401:
+            # Responses cached under the expired token can no longer be trusted
+            _MCP_CACHE.clear()
+            _LAST_VALIDATED = None
             console.print("[yellow]Token expired. Getting a new token...[/yellow]")
-            azure_token = get_azure_token()
+            azure_token = await get_azure_token(force_refresh=True)
             if azure_token:
-                headers["Authorization"] = f"Bearer {azure_token}"
-                response = requests.post(f"{FUNCTION_APP_URL}/{endpoint}", json=data, headers=headers)
+                response = await session.post(url, content=body, headers={"Authorization": f"Bearer {azure_token}"})
             else:
                 return {"error": "Failed to refresh authentication token"}
         
         response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
+        # Decode the raw body with orjson when available rather than response.json()
+        result = json_loads(response.content)
+        if cache_key:
+            _cache_response(cache_key, result)
+        return result
+    except httpx.HTTPStatusError as e:
+        console.print(f"[bold red]Error calling MCP server: {str(e)}[/bold red]")
+        # The status lets callers react to specific failures, e.g. a 404 for a route the server lacks
+        return {"error": str(e), "status": e.response.status_code}
+    # InvalidURL (e.g. a malformed FUNCTION_APP_URL) is not an HTTPError subclass
+    except (httpx.HTTPError, httpx.InvalidURL, ValueError) as e:
         console.print(f"[bold red]Error calling MCP server: {str(e)}[/bold red]")
         return {"error": str(e)}
 
+# Formatters for incident property values by exact type; anything else goes through str
+INCIDENT_VALUE_FORMATTERS = {dict: json_dumps_pretty, list: json_dumps_pretty, str: str}
+
+def format_incident_value(value) -> str:
+    """Format an incident property for display, pretty-printing nested structures as JSON."""
+    return INCIDENT_VALUE_FORMATTERS.get(type(value), str)(value)
+
+class IncidentBatcher:
+    """
+    Coalesces concurrent incident lookups into incidents/batch-get requests.
+    Lookups queued within max_queue_time of each other share one request of up
+    to max_batch_size incidents. A lone lookup uses incidents/get, as does every
+    lookup once the server has answered incidents/batch-get with a 404 (a server
+    deployed before that route existed).
+    """
+    
+    def __init__(self, max_batch_size: int = 20, max_queue_time: float = 0.02):
+        self.max_batch_size = max_batch_size
+        self.max_queue_time = max_queue_time
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        self._batches = set()  # keeps in-flight batch tasks referenced until they finish
+        self._batch_supported = True
+    
+    async def get(self, incident_id: str) -> dict:
+        """Get an incident, returning a response shaped like incidents/get."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(incident_id, []).append(future)
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_timer is None:
+            self._flush_timer = loop.call_later(self.max_queue_time, self._flush)
+        return await future
+    
+    def _flush(self):
+        """Send the queued lookups as one batch."""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        pending, self._pending = self._pending, {}
+        if pending:
+            task = asyncio.ensure_future(self._process_batch(pending))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+    
+    async def _get_individually(self, incident_ids: List[str]) -> Dict[str, dict]:
+        """Fetch incidents with one incidents/get call each, made concurrently."""
+        responses = await asyncio.gather(*(call_mcp_function("incidents/get", {"id": incident_id})
+                                           for incident_id in incident_ids))
+        return dict(zip(incident_ids, responses))
+    
+    async def _get_batch(self, incident_ids: List[str]) -> Dict[str, dict]:
+        """Fetch incidents with one incidents/get-shaped response per ID."""
+        if len(incident_ids) == 1 or not self._batch_supported:
+            return await self._get_individually(incident_ids)
+        response = await call_mcp_function("incidents/batch-get", {"ids": incident_ids})
+        if response.get("status") == 404:
+            self._batch_supported = False
+            return await self._get_individually(incident_ids)
+        incidents = response.get("incidents") or {}
+        return {
+            incident_id: ({"incident": incidents[incident_id]} if incident_id in incidents
+                          else {"error": response.get("error", f"Incident {incident_id} not found")})
+            for incident_id in incident_ids
+        }
+    
+    async def _process_batch(self, pending: Dict[str, List[asyncio.Future]]):
+        """Fetch a batch of incidents and resolve the lookups waiting on them."""
+        try:
+            results = await self._get_batch(list(pending))
+        except Exception as e:
+            results = dict.fromkeys(pending, {"error": str(e)})
+        for incident_id, futures in pending.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(results[incident_id])
+
+_INCIDENT_BATCHER = IncidentBatcher()
+
+def make_table(title: str, columns) -> "Table":
+    """Build a table with the given column layout."""
+    from rich.table import Table
+    table = Table(title=title)
+    for header, style, options in columns:
+        table.add_column(header, style=style, **options)
+    return table
+
 def display_incident_details(incident):
     """Display incident details in a formatted table."""
-    table = Table(title=f"Incident: {incident['title']}")
-    table.add_column("Property", style="cyan")
-    table.add_column("Value", style="green")
-    
-    for key, value in incident.items():
-        if isinstance(value, dict):
-            table.add_row(key, json.dumps(value, indent=2))
-        elif isinstance(value, list):
-            table.add_row(key, json.dumps(value, indent=2))
-        else:
-            table.add_row(key, str(value))
+    rows = [(key, format_incident_value(value)) for key, value in incident.items()]
+    
+    table = make_table(f"Incident: {incident['title']}", INCIDENT_DETAIL_COLUMNS)
+    for row in rows:
+        table.add_row(*row)
+    
+    console.print(table)
+
+def display_metrics_dashboard():
+    """Display the security metrics dashboard in a formatted table."""
+    table = make_table("Security Insights Dashboard", METRICS_COLUMNS)
+    for row in SAMPLE_METRIC_ROWS:
+        table.add_row(*row)
     
     console.print(table)
 
+def build_incident_message(incident_id: str, incident: dict) -> dict:
+    """Build the system message carrying an incident's details as compact JSON."""
+    return {
+        "role": "system",
+        "content": f"We are working on incident {incident_id}. Here are the details: {json_dumps_compact(incident)}"
+    }
+
+def build_metrics_message(metrics: dict) -> dict:
+    """Build the system message carrying the security metrics dashboard as compact JSON."""
+    return {
+        "role": "system",
+        "content": f"Current security metrics dashboard: {json_dumps_compact(metrics)}"
+    }
+
+def assistant_panel(content):
+    """Build the panel used to render a Triage Bot response."""
+    from rich.markdown import Markdown
+    return Panel(Markdown(content), title="Triage Bot", border_style="green")
+
 def display_chat_message(role, content):
     """Display a chat message with appropriate formatting."""
     if role == "user":
         console.print(Panel(content, title="You", border_style="blue"))
     elif role == "assistant":
-        console.print(Panel(Markdown(content), title="Triage Bot", border_style="green"))
+        console.print(assistant_panel(content))
     elif role == "system":
         console.print(Panel(content, title="System", border_style="yellow"))
     else:
@@ -201,31 +852,48 @@ def display_chat_message(role, content):
 @app.command()
 def login():
     """Login to Azure and authenticate with the triage bot."""
-    global user_info, azure_token
+    return run_async(authenticate_session)()
+
+async def authenticate_session(trust_fresh_token: bool = False):
+    """
+    Log in to Azure if needed and validate the session with the MCP server.
+    With trust_fresh_token (used by check_session), a silently acquired token that isn't
+    about to expire is trusted on its exp claim without asking the MCP server; the login
+    command always validates with the server.
+    """
+    global user_info, azure_token, _LAST_VALIDATED
     
     # Check if already logged in
-    user_info_check = check_azure_cli_login()
-    token_check = get_azure_token()
+    user_info_check, token_check = await asyncio.gather(check_azure_login(), get_azure_token())
     
-    if user_info_check and token_check:
+    already_logged_in = bool(user_info_check and token_check)
+    if already_logged_in:
         user_info = user_info_check
         azure_token = token_check
-        user_name = user_info.get("user", {}).get("name", "Unknown User")
-        console.print(f"[green]Already logged in as: [bold]{user_name}[/bold][/green]")
     else:
         # Need to login
-        user_info, azure_token = login_to_azure()
+        user_info, azure_token = await login_to_azure()
         
     if not user_info or not azure_token:
         console.print("[bold red]Failed to log in to Azure[/bold red]")
         return False
         
-    # Validate with MCP server        console.print("[yellow]Validating authentication with MCP server and checking tenant access...[/yellow]")
-        console.print("[dim]Verifying Azure AD token validity and authorized scope claims...[/dim]")
-        response = call_mcp_function("authenticate", {})
+    user_name = (user_info.get("user") or {}).get("name", "Unknown User")
+    if already_logged_in:
+        console.print(f"[green]Already logged in as: [bold]{user_name}[/bold][/green]")
+        # The MCP server still rejects a trusted token with a 401 if it isn't accepted there
+        remaining = token_seconds_remaining(azure_token) if trust_fresh_token else None
+        if remaining is not None and remaining > SESSION_VALIDATION_MARGIN:
+            return True
+    
+    # Validate with MCP server
+    console.print("[yellow]Validating authentication with MCP server and checking tenant access...[/yellow]")
+    console.print("[dim]Verifying Azure AD token validity and authorized scope claims...[/dim]")
+    response = await call_mcp_function("authenticate", {})
     
-    if response.get("data") and "user_info" in response.get("data", {}):
-        user_name = user_info.get("user", {}).get("name", "Unknown User")
+    data = response.get("data")
+    if data and "user_info" in data:
+        _LAST_VALIDATED = time.monotonic()
         console.print(f"[green]Successfully authenticated as: [bold]{user_name}[/bold][/green]")
         return True
     else:
@@ -234,12 +902,13 @@ def login():
         return False
 
 @app.command()
-def list_incidents(
+@run_async
+async def list_incidents(
     limit: int = typer.Option(10, help="Number of incidents to retrieve"),
     severity: Optional[str] = typer.Option(None, help="Filter by severity (low, medium, high, critical)")
 ):
     """List recent security incidents from Azure Sentinel."""
-    if not check_session():
+    if not await check_session():
         return
     
     console.print("[yellow]Fetching incidents from Azure Sentinel...[/yellow]")
@@ -250,27 +919,16 @@ def list_incidents(
         } if severity else {}
     }
     
-    response = call_mcp_function("incidents/list", data)
+    response = await call_mcp_function("incidents/list", data)
     if "incidents" in response:
         incidents = response["incidents"]
         
-        table = Table(title="Azure Sentinel Incidents")
-        table.add_column("Incident ID", style="cyan")
-        table.add_column("Title", style="green")
-        table.add_column("Severity", style="red")
-        table.add_column("Status", style="yellow")
-        table.add_column("Created", style="blue")
-        table.add_column("Tactics", style="magenta")
+        table = make_table("Azure Sentinel Incidents", INCIDENT_LIST_COLUMNS)
         
         for incident in incidents:
-            tactics = ", ".join(incident.get("tactics", [])) if incident.get("tactics") else "N/A"
             table.add_row(
-                incident.get("id", "N/A"),
-                incident.get("title", "N/A"),
-                incident.get("severity", "N/A"),
-                incident.get("status", "N/A"),
-                incident.get("createdTime", "N/A"),
-                tactics
+                *("N/A" if incident.get(field) is None else str(incident[field]) for field in INCIDENT_LIST_FIELDS),
+                ", ".join(incident["tactics"]) if incident.get("tactics") else "N/A"
             )
         
         console.print(table)
@@ -278,193 +936,269 @@ def list_incidents(
         console.print("[bold red]Failed to retrieve incidents[/bold red]")
 
 @app.command()
-def get_incident(incident_id: str):
+@run_async
+async def get_incident(incident_id: str):
     """Get detailed information about a specific incident."""
-    if not check_session():
+    if not await check_session():
         return
     
     console.print(f"[yellow]Fetching details for incident {incident_id}...[/yellow]")
-    response = call_mcp_function("incidents/get", {"id": incident_id})
+    response = await call_mcp_function("incidents/get", {"id": incident_id})
     if "incident" in response:
         display_incident_details(response["incident"])
     else:
         console.print("[bold red]Failed to retrieve incident details[/bold red]")
 
+CHAT_HELP_TEXT = """
+                    Available Commands:
+                    /incident [uuid] - Load an incident by ID (e.g., /incident 42684e72-e7f6-4b3a-b7a6-8d23da0728b3)
+                    /metrics - Show security metrics dashboard 
+                    /help - Show this help message
+                    /exit or /quit - End the chat session
+                    
+                    Natural Language Query Examples:
+                    - "Find all sign-in attempts from unusual locations for user john.doe@contoso.com"
+                    - "Show resource modifications in subscription 5f68e57f-ca99-4c39-a2e0-ec42faa8d0a5 in the last 48 hours"
+                    - "List all alerts with MITRE ATT&CK technique T1059 (Command and Scripting Interpreter)"
+                    - "Show network connections from VM WEBSRV01 to IP address 51.138.24.7 in the last week"
+                    - "Find instances of defender alert 'Suspicious process observed' across all endpoints"
+                    - "Compare this incident with similar incidents in the last 30 days"
+                    
+                    Type 'tools' to see additional incident response capabilities
+                    """
+
+# What the chat loop does after a /command has been handled
+CHAT_ASK_MODEL = "ask_model"  # send the command to the model like any other message
+CHAT_CONTINUE = "continue"  # wait for the next input
+CHAT_EXIT = "exit"  # end the chat session
+
+# Plain chat input that ends the session
+EXIT_WORDS = frozenset(["exit", "quit"])
+
+# Parses "/command [args]" chat input
+_CMD_RE = re.compile(r"^/(\S+)(?:\s+(.*))?$")
+
+async def _handle_incident_command(args: Optional[str], context: dict) -> str:
+    """Load an incident into the chat context."""
+    if args:
+        incident_id = args.split()[0]
+        response = await _INCIDENT_BATCHER.get(incident_id)
+        if "incident" in response:
+            # Reloading an incident served from the response cache returns the same
+            # object, so its already-serialized context message can be reused
+            if context.get("incident") is not response["incident"]:
+                context["incident"] = response["incident"]
+                context["incident_message"] = build_incident_message(incident_id, context["incident"])
+            display_incident_details(response["incident"])
+        else:
+            display_chat_message("system", f"Failed to retrieve incident {incident_id}")
+    return CHAT_ASK_MODEL
+
+async def _handle_metrics_command(args: Optional[str], context: dict) -> str:
+    """Show the security metrics dashboard, loading it into the chat context if needed."""
+    if "metrics" not in context:
+        response = await call_mcp_function("metrics/dashboard", {})
+        if "metrics" not in response:
+            display_chat_message("system", "Failed to retrieve security metrics")
+            return CHAT_CONTINUE
+        context["metrics"] = response["metrics"]
+        context["metrics_message"] = build_metrics_message(context["metrics"])
+    display_metrics_dashboard()
+    return CHAT_CONTINUE
+
+async def _handle_help_command(args: Optional[str], context: dict) -> str:
+    """Show the available chat commands."""
+    display_chat_message("system", CHAT_HELP_TEXT)
+    return CHAT_CONTINUE
+
+async def _handle_exit_command(args: Optional[str], context: dict) -> str:
+    """End the chat session."""
+    console.print("[yellow]Ending chat session...[/yellow]")
+    return CHAT_EXIT
+
+_CHAT_COMMANDS = {
+    "incident": _handle_incident_command,
+    "metrics": _handle_metrics_command,
+    "help": _handle_help_command,
+    "exit": _handle_exit_command,
+    "quit": _handle_exit_command,
+}
+
+async def handle_chat_command(user_input: str, context: dict) -> str:
+    """Run a /command typed in chat and return what the chat loop should do next."""
+    match = _CMD_RE.match(user_input)
+    if not match:
+        return CHAT_ASK_MODEL
+    command, args = match.groups()
+    handler = _CHAT_COMMANDS.get(command)
+    if handler is None:
+        display_chat_message("system", f"Unknown command: {command}")
+        return CHAT_CONTINUE
+    return await handler(args, context)
+
+async def refresh_token_in_background():
+    """Refresh the session token while the chat waits for input, so the next call doesn't hit a 401."""
+    global azure_token
+    token = await get_azure_token()
+    if token:
+        azure_token = token
+
+def _chat_prompt_session() -> "PromptSession":
+    """Create the chat input prompt, keeping its history next to the token cache."""
+    from prompt_toolkit import PromptSession
+    from prompt_toolkit.history import FileHistory
+    try:
+        CHAT_HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+        return PromptSession(history=FileHistory(str(CHAT_HISTORY_FILE)))
+    except OSError:
+        return PromptSession()
+
+async def fetch_incident_context(incident_id: str) -> Tuple[dict, dict]:
+    """Fetch an incident and the metrics dashboard concurrently for the chat context."""
+    return await asyncio.gather(
+        _INCIDENT_BATCHER.get(incident_id),
+        call_mcp_function("metrics/dashboard", {})
+    )
+
 @app.command()
+@run_async
 async def chat(incident_id: Optional[str] = None):
     """Start an interactive chat session with the triage bot."""
-    if not check_session():
+    from rich.live import Live
+    context = {}
+    if incident_id:
+        # Session validation, the incident and the metrics dashboard are independent,
+        # so fetch them all concurrently
+        session_ok, (incident_response, metrics_response) = await asyncio.gather(
+            check_session(),
+            fetch_incident_context(incident_id)
+        )
+        if not session_ok:
+            return
+        # Without a cached token the prefetch can't authenticate until login completes
+        if incident_response.get("error") == AUTH_REQUIRED_ERROR:
+            incident_response, metrics_response = await fetch_incident_context(incident_id)
+    elif not await check_session():
         return
     
     console.print("[bold green]Starting interactive incident triage chat...[/bold green]")
     console.print("Type 'exit' or 'quit' to end the session.")
     
-    context = {}
     if incident_id:
-        response = call_mcp_function("incidents/get", {"id": incident_id})
-        if "incident" in response:
-            context["incident"] = response["incident"]
+        if "incident" in incident_response:
+            context["incident"] = incident_response["incident"]
             console.print(f"[green]Loaded context for incident {incident_id}[/green]")
+        if "metrics" in metrics_response:
+            context["metrics"] = metrics_response["metrics"]
+            context["metrics_message"] = build_metrics_message(context["metrics"])
     
-    messages = [
-        {
-            "role": "system", 
-            "content": "You are an Azure Security Incident Triage Bot. Your job is to help security analysts investigate and triage incidents. "
-                      "You can provide guidance, answer questions about Azure security, and help resolve incidents. "
-                      "Be concise, accurate, and helpful."
-        }
-    ]
+    # The incident context is serialized once per loaded incident and only the most
+    # recent turns of the conversation are re-sent with each request
+    history = []
     
     # Add context if we have an incident
     if "incident" in context:
-        incident_context = f"We are working on incident {incident_id}. Here are the details: {json.dumps(context['incident'], indent=2)}"
-        messages.append({"role": "system", "content": incident_context})
+        context["incident_message"] = build_incident_message(incident_id, context["incident"])
         display_chat_message("system", f"Context loaded for incident {incident_id}")
     
     display_chat_message("assistant", "Hello! I'm your Azure Security Incident Triage assistant. How can I help you today?")
     
+    # Input is read asynchronously so background work can run while the user types
+    prompt_session = _chat_prompt_session()
+    refresh_task = None
     while True:
-        user_input = Prompt.ask("\n[bold blue]You[/bold blue]")
+        if refresh_task is None or refresh_task.done():
+            refresh_task = asyncio.create_task(refresh_token_in_background())
+        try:
+            user_input = await prompt_session.prompt_async("\nYou> ")
+        except (EOFError, KeyboardInterrupt):
+            user_input = "exit"
         
-        if user_input.lower() in ["exit", "quit"]:
+        if user_input.lower() in EXIT_WORDS:
             console.print("[yellow]Ending chat session...[/yellow]")
             break
         
-        messages.append({"role": "user", "content": user_input})
+        history.append({"role": "user", "content": user_input})
         
         # Execute tool commands
         if user_input.startswith("/"):
-            tool_command = user_input[1:].strip().split()
-            if len(tool_command) > 0:
-                command = tool_command[0]
-                args = tool_command[1:]
-                
-                if command == "incident":
-                    if len(args) > 0:
-                        incident_id = args[0]
-                        response = call_mcp_function("incidents/get", {"id": incident_id})
-                        if "incident" in response:
-                            context["incident"] = response["incident"]
-                            display_incident_details(response["incident"])
-                            incident_context = f"We are working on incident {incident_id}. Here are the details: {json.dumps(context['incident'], indent=2)}"
-                            messages.append({"role": "system", "content": incident_context})
-                        else:
-                            display_chat_message("system", f"Failed to retrieve incident {incident_id}")
-                elif command == "help":
-                    help_text = """
-                    Available Commands:
-                    /incident [uuid] - Load an incident by ID (e.g., /incident 42684e72-e7f6-4b3a-b7a6-8d23da0728b3)
-                    /metrics - Show security metrics dashboard 
-                    /help - Show this help message
-                    /exit or /quit - End the chat session
-                    
-                    Natural Language Query Examples:
-                    - "Find all sign-in attempts from unusual locations for user john.doe@contoso.com"
-                    - "Show resource modifications in subscription 5f68e57f-ca99-4c39-a2e0-ec42faa8d0a5 in the last 48 hours"
-                    - "List all alerts with MITRE ATT&CK technique T1059 (Command and Scripting Interpreter)"
-                    - "Show network connections from VM WEBSRV01 to IP address 51.138.24.7 in the last week"
-                    - "Find instances of defender alert 'Suspicious process observed' across all endpoints"
-                    - "Compare this incident with similar incidents in the last 30 days"
-                    
-                    Type 'tools' to see additional incident response capabilities
-                    """
-                    display_chat_message("system", help_text)
-                    continue
-                elif command in ["exit", "quit"]:
-                    console.print("[yellow]Ending chat session...[/yellow]")
-                    break
-                else:
-                    display_chat_message("system", f"Unknown command: {command}")
-                    continue
+            action = await handle_chat_command(user_input, context)
+            if action == CHAT_EXIT:
+                break
+            if action == CHAT_CONTINUE:
+                continue
+        
+        messages = [SYSTEM_MESSAGE]
+        if context.get("incident_message"):
+            messages.append(context["incident_message"])
+        if context.get("metrics_message"):
+            messages.append(context["metrics_message"])
+        messages.extend(history[-2 * CFG.chat_history_turns:])
         
-        # Get AI response
-        console.print("[dim]Thinking...[/dim]")
-        response = await chat_with_model(messages)
-        messages.append({"role": "assistant", "content": response})
-        display_chat_message("assistant", response)
+        # Get AI response, rendering it as it streams in
+        with Live(assistant_panel("*Thinking...*"), console=console, refresh_per_second=15) as live:
+            response = await chat_with_model(messages, on_delta=lambda text: live.update(assistant_panel(text)))
+            live.update(assistant_panel(response))
+        history.append({"role": "assistant", "content": response})
+        del history[:-2 * CFG.chat_history_turns]
+
+def token_seconds_remaining(token: str) -> Optional[float]:
+    """Get the seconds until a JWT's exp claim, or None if it cannot be decoded."""
+    try:
+        payload = token.split(".")[1]
+        claims = json_loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"]) - time.time()
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
 
-def check_session():
+def session_recently_validated(remaining: Optional[float]) -> bool:
+    """
+    Check whether the MCP server validated the session recently enough (earlier in this
+    process) to skip re-validating it.
+    """
+    return (_LAST_VALIDATED is not None and time.monotonic() - _LAST_VALIDATED < SESSION_VALIDATION_TTL
+            and (remaining is None or remaining > TOKEN_REFRESH_MARGIN))
+
+async def check_session():
     """Check if user is logged in and has a valid Azure token."""
-    global user_info, azure_token
+    global user_info, azure_token, _LAST_VALIDATED
     
     if not user_info or not azure_token:
         console.print("[yellow]You are not logged in. Please login first.[/yellow]")
-        return login()
+        return await authenticate_session(trust_fresh_token=True)
         
+    # The token's own expiry is enough to trust it unless it is about to lapse
+    remaining = token_seconds_remaining(azure_token)
+    if remaining is not None and remaining > SESSION_VALIDATION_MARGIN:
+        return True
+    # Otherwise a recent validation is trusted while the token hasn't reached its refresh margin
+    if session_recently_validated(remaining):
+        return True
+    
     # Verify token is still valid
     try:
-        response = call_mcp_function("authenticate", {})
+        response = await call_mcp_function("authenticate", {})
         if not response.get("data"):
             console.print("[yellow]Your session has expired. Please login again.[/yellow]")
-            return login()
+            return await authenticate_session()
+        _LAST_VALIDATED = time.monotonic()
     except Exception:
         console.print("[yellow]Failed to validate session. Please login again.[/yellow]")
-        return login()
+        return await authenticate_session()
         
     return True
 
 @app.command()
-def metrics():
+@run_async
+async def metrics():
     """Display security metrics and insights dashboard."""
-    if not check_session():
+    if not await check_session():
         return
     
     console.print("[yellow]Fetching security metrics and insights...[/yellow]")
-    response = call_mcp_function("metrics/dashboard", {})
+    response = await call_mcp_function("metrics/dashboard", {})
     if "metrics" in response:
-        metrics = response["metrics"]
-        
-        table = Table(title="Security Insights Dashboard")
-        table.add_column("Metric Name", style="cyan")
-        table.add_column("Value", style="green")
-        table.add_column("Trend", style="yellow")
-        table.add_column("Resource Provider", style="magenta")
-        
-        # These are more realistic Azure Monitor/Defender metrics that security analysts actually use
-        sample_metrics = [
-            {
-                "name": "Total Active Alerts",
-                "value": 47,
-                "change": "+12% from last week",
-                "provider": "Microsoft.Security/alerts"
-            },
-            {
-                "name": "Failed Sign-in Attempts",
-                "value": 216,
-                "change": "+28% from baseline", 
-                "provider": "Microsoft.Entra/signInLogs"
-            },
-            {
-                "name": "Suspicious Resource Deployments",
-                "value": 5,
-                "change": "New detection",
-                "provider": "Microsoft.Resources/deployments"
-            },
-            {
-                "name": "Endpoints with Malware Detections",
-                "value": 3,
-                "change": "-1 from last report",
-                "provider": "Microsoft.Defender/endpoints"
-            },
-            {
-                "name": "Security Score",
-                "value": 72,
-                "change": "+4 points",
-                "provider": "Microsoft.Security/secureScores"
-            }
-        ]
-        
-        for metric in sample_metrics:
-            change = metric["change"]
-            change_style = "green" if "+" in change or "-" in change and "from" not in change else "red" if "+" not in change and "New" not in change else "yellow"
-            table.add_row(
-                metric["name"],
-                str(metric["value"]),
-                f"[{change_style}]{change}[/{change_style}]",
-                metric["provider"]
-            )
-        
-        console.print(table)
+        display_metrics_dashboard()
     else:
         console.print("[bold red]Failed to retrieve security metrics[/bold red]")
 
@@ -514,21 +1248,32 @@ def tools():
     console.print("  [green]Generate a MITRE ATT&CK tactics and techniques mapping for this incident[/green]")
     console.print("  [green]Show me resource modifications in affected subscription during the incident timeframe[/green]")
 
+BANNER_TEXT = (
+    "[bold blue]Azure Security Incident Triage Bot[/bold blue]\n"
+    "[green]A CLI tool for triaging Azure security incidents[/green]\n\n"
+    "[yellow]Tip: Run 'python triage_bot.py tools' to see all available commands and examples[/yellow]"
+)
+
 @app.callback()
-def main():
+def main(
+    quiet: Optional[bool] = typer.Option(
+        None, "--quiet/--no-quiet", "-q",
+        help="Skip the banner and configuration warnings (default when output is not a terminal)"
+    )
+):
     """Azure Security Incident Triage Bot CLI."""
-    console.print(Panel.fit(
-        "[bold blue]Azure Security Incident Triage Bot[/bold blue]\n"
-        "[green]A CLI tool for triaging Azure security incidents[/green]\n\n"
-        "[yellow]Tip: Run 'python triage_bot.py tools' to see all available commands and examples[/yellow]",
-        border_style="green"
-    ))
+    if quiet is None:
+        quiet = not sys.stdout.isatty()
+    if quiet:
+        return
+    
+    console.print(Panel.fit(BANNER_TEXT, border_style="green"))
     
     # Check environment variables
-    if not FUNCTION_APP_URL:
+    if not CFG.function_app_url:
         console.print("[bold yellow]Warning: FUNCTION_APP_URL environment variable not set. Please set it in .env file.[/bold yellow]")
     
-    if not OPENAI_API_KEY:
+    if not CFG.openai_api_key:
         console.print("[bold yellow]Warning: OPENAI_API_KEY environment variable not set. Please set it in .env file.[/bold yellow]")
 
 if __name__ == "__main__":
@@ -4,7 +4,13 @@ Provides token validation and multi-tenant access through Azure Lighthouse deleg
 """
 
 import os
+import re
 import logging
+import hashlib
+import base64
+import functools
+import time
+from dataclasses import dataclass
 from typing import Optional, Dict, Any, Tuple, List
 import json
 import azure.functions as func
@@ -12,10 +18,19 @@ from microsoft_identity_web import ConfidentialClientApplication, ClaimsValidato
 from microsoft_identity_web.adapters import AzureFunctionsAuthAdapter
 
 # Import Key Vault utilities
-from key_vault_utils import get_secret
+from key_vault_utils import get_secret, prefetch_secrets, clear_cache as clear_secret_cache
+
+# Log arguments are passed separately so messages are only formatted when they are emitted
+_log = logging.getLogger(__name__)
 
 # Constants
 GRAPH_API_ENDPOINT = "https://graph.microsoft.com/v1.0"
+GRAPH_DEFAULT_SCOPE = "https://graph.microsoft.com/.default"
+BEARER_PREFIX = "Bearer "
+# Tenant ID in a token issuer, which is either of:
+# - https://sts.windows.net/{tenant_id}/
+# - https://login.microsoftonline.com/{tenant_id}/v2.0
+_TENANT_RE = re.compile(r"(?:sts\.windows\.net|login\.microsoftonline\.com)/([0-9a-f-]{36})", re.IGNORECASE)
 
 # Config keys mapping to Key Vault secret names
 CONFIG_KEYS = {
@@ -27,9 +42,45 @@ CONFIG_KEYS = {
     "ENABLE_AUTO_TENANT_DISCOVERY": "enable-auto-tenant-discovery"  # Auto-discover tenants user has access to
 }
 
+# Start fetching the configuration secrets while the worker finishes loading
+prefetch_secrets(CONFIG_KEYS.values())
+
+# Caches below are keyed by _token_hash(token) rather than the token itself, so lookups
+# don't hash the full (often ~2 KB) token string and raw tokens aren't kept in memory.
+def _token_hash(token: str) -> bytes:
+    """Hash a user token into a 16-byte cache key."""
+    return hashlib.sha256(token.encode()).digest()[:16]
+
+def _bounded_set(cache: Dict, key: Any, value: Any, max_size: int) -> None:
+    """Set a cache entry, evicting the oldest entry when the cache is full."""
+    if key not in cache and len(cache) >= max_size:
+        cache.pop(next(iter(cache)), None)
+    cache[key] = value
+
+# Successfully validated tokens: token hash -> (expires_at, user_info).
+# Failed validations are never cached.
+TOKEN_CACHE_TTL = 30  # seconds
+TOKEN_CACHE_MAX_SIZE = 10000
+TOKEN_EXPIRY_MARGIN = 5  # seconds before a token's exp claim after which it is no longer served from cache
+_validated_tokens: Dict[bytes, Tuple[float, Dict[str, Any]]] = {}
+
+# Token issuers: token hash -> iss claim
+ISSUER_CACHE_MAX_SIZE = 4096
+_token_issuers: Dict[bytes, Optional[str]] = {}
+
+def _cache_validated_token(cache_key: bytes, claims: Dict[str, Any], user_info: Dict[str, Any]) -> None:
+    """Cache a validated token's user info until the TTL or shortly before the token expires."""
+    expires_at = time.time() + TOKEN_CACHE_TTL
+    if claims.get("exp"):
+        expires_at = min(expires_at, float(claims["exp"]) - TOKEN_EXPIRY_MARGIN)
+    if expires_at <= time.time():
+        return
+    _bounded_set(_validated_tokens, cache_key, (expires_at, user_info), TOKEN_CACHE_MAX_SIZE)
+
 def get_config_value(key: str, default: Any = None) -> Any:
     """
     Get configuration value, first trying Key Vault, then environment variables.
+    Key Vault lookups go through the secret cache, so repeated calls are cheap.
     """
     # If the key is in our config mapping, try Key Vault
     if key in CONFIG_KEYS:
@@ -41,14 +92,64 @@ def get_config_value(key: str, default: Any = None) -> Any:
     # Fall back to environment variables
     return os.environ.get(key, default)
 
+@dataclass(frozen=True)
+class AuthConfig:
+    """Authentication settings, resolved once from Key Vault and the environment."""
+    home_tenant_id: str  # Primary tenant where the Function App is registered
+    client_id: str
+    client_secret: str
+    required_scopes: Tuple[str, ...]
+    multi_tenant_enabled: bool
+    auto_tenant_discovery: bool
+    
+    @classmethod
+    def load(cls) -> "AuthConfig":
+        """Resolve the authentication settings."""
+        scopes = get_config_value("REQUIRED_SCOPES", "")
+        return cls(
+            home_tenant_id=get_config_value("AZURE_HOME_TENANT_ID", ""),
+            client_id=get_config_value("AZURE_CLIENT_ID", ""),
+            client_secret=get_config_value("AZURE_CLIENT_SECRET", ""),
+            required_scopes=tuple(scopes.split(",")) if scopes else (),
+            multi_tenant_enabled=get_config_value("MULTI_TENANT_ENABLED", "false").lower() == "true",
+            auto_tenant_discovery=get_config_value("ENABLE_AUTO_TENANT_DISCOVERY", "false").lower() == "true"
+        )
+    
+    @property
+    def is_complete(self) -> bool:
+        """Whether the settings needed to authenticate all resolved to a value."""
+        return bool(self.home_tenant_id and self.client_id and self.client_secret)
+
+_auth_config: Optional[AuthConfig] = None
+
+def get_auth_config() -> AuthConfig:
+    """
+    Get the authentication settings, resolving them on first use.
+    Incomplete settings (e.g. Key Vault was briefly unreachable and a secret fell back
+    to an empty default) are not kept, so the next call resolves them again.
+    """
+    global _auth_config
+    if _auth_config is not None:
+        return _auth_config
+    config = AuthConfig.load()
+    if config.is_complete:
+        _auth_config = config
+    return config
+
+def clear_config_cache() -> None:
+    """Forget resolved configuration values, including the cached Key Vault secrets."""
+    global _auth_config
+    _auth_config = None
+    clear_secret_cache()
+
 # Get configuration values
 def get_home_tenant_id() -> str:
     """Get the primary Azure AD tenant ID where the Function App is registered."""
-    return get_config_value("AZURE_HOME_TENANT_ID", "")
+    return get_auth_config().home_tenant_id
 
 def is_auto_tenant_discovery_enabled() -> bool:
     """Check if automatic tenant discovery is enabled."""
-    return get_config_value("ENABLE_AUTO_TENANT_DISCOVERY", "false").lower() == "true"
+    return get_auth_config().auto_tenant_discovery
 
 def get_managed_tenant_ids() -> List[str]:
     """
@@ -62,28 +163,41 @@ def get_managed_tenant_ids() -> List[str]:
 
 def is_multi_tenant_enabled() -> bool:
     """Check if multi-tenant support is enabled."""
-    return get_config_value("MULTI_TENANT_ENABLED", "false").lower() == "true"
+    return get_auth_config().multi_tenant_enabled
 
 def get_client_id() -> str:
     """Get the App Registration client ID for the API."""
-    return get_config_value("AZURE_CLIENT_ID", "")
+    return get_auth_config().client_id
 
 def get_client_secret() -> str:
     """Get the App Registration client secret."""
-    return get_config_value("AZURE_CLIENT_SECRET", "")
+    return get_auth_config().client_secret
 
 def get_required_scopes() -> list:
     """Get required scopes from config."""
-    scopes = get_config_value("REQUIRED_SCOPES", "")
-    return scopes.split(",") if scopes else []
+    return list(get_auth_config().required_scopes)
+
+def _peek_issuer(token: str, cache_key: bytes) -> Optional[str]:
+    """
+    Read the issuer claim from a JWT without verifying it.
+    Only used to pick the tenant's validator; the token is verified afterwards.
+    Memoized by token hash since clients replay the same token on every request.
+    """
+    if cache_key in _token_issuers:
+        return _token_issuers[cache_key]
+    payload = token.split(".")[1]
+    claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    issuer = claims.get("iss")
+    _bounded_set(_token_issuers, cache_key, issuer, ISSUER_CACHE_MAX_SIZE)
+    return issuer
 
 def get_token_from_header(req: func.HttpRequest) -> Optional[str]:
     """Extract the Bearer token from the Authorization header."""
     auth_header = req.headers.get("Authorization")
-    if not auth_header or not auth_header.startswith("Bearer "):
+    if not auth_header or not auth_header.startswith(BEARER_PREFIX):
         return None
     
-    return auth_header.split("Bearer ")[1]
+    return auth_header[len(BEARER_PREFIX):]
 
 class MicrosoftIdentityAuthenticator:
     """
@@ -92,25 +206,34 @@ class MicrosoftIdentityAuthenticator:
     """
     
     def __init__(self):
-        self.home_tenant_id = get_home_tenant_id()
-        self.multi_tenant_enabled = is_multi_tenant_enabled()
-        self.auto_tenant_discovery = is_auto_tenant_discovery_enabled()
-        self.client_id = get_client_id()
-        self.client_secret = get_client_secret()
-        self.required_scopes = get_required_scopes()
+        config = get_auth_config()
+        self.home_tenant_id = config.home_tenant_id
+        self.multi_tenant_enabled = config.multi_tenant_enabled
+        self.auto_tenant_discovery = config.auto_tenant_discovery
+        self.client_id = config.client_id
+        self.client_secret = config.client_secret
+        self.required_scopes = list(config.required_scopes)
+        self._required_scopes_set = frozenset(self.required_scopes)
         
         # Dictionary of auth adapters - will be populated dynamically with auto-discovery
+        # (the home tenant's adapter is added by home_adapter on first use)
         self.auth_adapters = {}
-        
-        # Create adapter for home tenant
-        self.auth_adapters[self.home_tenant_id] = AzureFunctionsAuthAdapter(
+    
+    @functools.cached_property
+    def home_adapter(self) -> AzureFunctionsAuthAdapter:
+        """The adapter for the home tenant, created on first use to keep cold starts short."""
+        adapter = AzureFunctionsAuthAdapter(
             tenant_id=self.home_tenant_id,
             client_id=self.client_id,
             client_credential=self.client_secret
         )
-        
-        # Create the confidential client application for the home tenant
-        self.app = ConfidentialClientApplication(
+        self.auth_adapters[self.home_tenant_id] = adapter
+        return adapter
+    
+    @functools.cached_property
+    def app(self) -> ConfidentialClientApplication:
+        """The confidential client application for the home tenant, created on first use."""
+        return ConfidentialClientApplication(
             client_id=self.client_id,
             client_credential=self.client_secret,
             authority=f"https://login.microsoftonline.com/{self.home_tenant_id}"
@@ -124,63 +247,59 @@ class MicrosoftIdentityAuthenticator:
         Returns:
             Tuple[bool, Dict, str]: (is_valid, user_info, error_message)
         """
+        # Reuse a recent successful validation of the same token
+        cache_key = _token_hash(token)
+        cached = _validated_tokens.get(cache_key)
+        if cached and cached[0] > time.time():
+            return True, dict(cached[1]), None
+        
         try:
             # Try to parse just enough of the token to get the issuer (tenant) information
             # We need this to know which tenant's adapter to use for validation
             try:
-                import jwt
-                # Just decode the header and payload without verification
-                decoded_token = jwt.decode(token, options={"verify_signature": False}, algorithms=["RS256"])
-                token_issuer = decoded_token.get("iss", "")
-                token_tenant_id = None
+                # Just read the issuer from the payload without verification
+                token_issuer = _peek_issuer(token, cache_key) or ""
                 
                 # Extract tenant ID from issuer
-                # Format could be either:
-                # - https://sts.windows.net/{tenant_id}/
-                # - https://login.microsoftonline.com/{tenant_id}/v2.0
-                if "sts.windows.net" in token_issuer:
-                    token_tenant_id = token_issuer.split("/")[-2] if token_issuer else None
-                elif "login.microsoftonline.com" in token_issuer:
-                    token_tenant_id = token_issuer.split("/")[-2] if token_issuer else None
+                match = _TENANT_RE.search(token_issuer)
+                token_tenant_id = match.group(1) if match else None
                 
-                logging.info(f"Token issued by tenant: {token_tenant_id or 'unknown'}")
+                _log.info("Token issued by tenant: %s", token_tenant_id or "unknown")
                 
                 # For multi-tenant scenarios with auto-discovery enabled
                 # Any tenant that issues a valid token is considered authorized
                 # The validation is done through JWT signature verification
                 if self.multi_tenant_enabled and token_tenant_id:
                     if token_tenant_id != self.home_tenant_id:
-                        logging.info(f"Cross-tenant access detected from tenant: {token_tenant_id}")
+                        _log.info("Cross-tenant access detected from tenant: %s", token_tenant_id)
                         # With auto-discovery, we dynamically create an adapter for this tenant
                         if self.auto_tenant_discovery and token_tenant_id not in self.auth_adapters:
-                            logging.info(f"Auto-creating validator for tenant: {token_tenant_id}")
+                            _log.info("Auto-creating validator for tenant: %s", token_tenant_id)
                             self.auth_adapters[token_tenant_id] = AzureFunctionsAuthAdapter(
                                 tenant_id=token_tenant_id,
                                 client_id=self.client_id,
                                 client_credential=self.client_secret
                             )
             except Exception as e:
-                logging.error(f"Error parsing token for tenant info: {str(e)}")
+                _log.error("Error parsing token for tenant info: %s", e)
                 token_tenant_id = None
             
             # Choose the appropriate adapter based on the token's tenant
-            adapter = None
-            if token_tenant_id in self.auth_adapters:
-                logging.info(f"Using adapter for tenant {token_tenant_id}")
-                adapter = self.auth_adapters[token_tenant_id]
+            adapter = self.auth_adapters.get(token_tenant_id)
+            if adapter is not None:
+                _log.info("Using adapter for tenant %s", token_tenant_id)
             else:
                 # If no tenant-specific adapter found, try the home tenant adapter
-                logging.info(f"No specific adapter for tenant {token_tenant_id}, using home tenant adapter")
-                adapter = self.auth_adapters[self.home_tenant_id]
+                _log.info("No specific adapter for tenant %s, using home tenant adapter", token_tenant_id)
+                adapter = self.home_adapter
             
             # Validate the token using the selected adapter
             claims = adapter.validate_token(token)
             
             # Validate required scopes
-            if self.required_scopes:
-                token_scopes = claims.get("scp", "").split(" ")
-                if not any(scope in token_scopes for scope in self.required_scopes):
-                    return False, None, f"Token doesn't have any of the required scopes: {self.required_scopes}"
+            token_scopes = claims.get("scp", "").split()
+            if self._required_scopes_set and self._required_scopes_set.isdisjoint(token_scopes):
+                return False, None, f"Token doesn't have any of the required scopes: {self.required_scopes}"
             
             # Extract user info from claims
             user_info = {
@@ -188,18 +307,19 @@ class MicrosoftIdentityAuthenticator:
                 "name": claims.get("name"),
                 "email": claims.get("preferred_username"),
                 "roles": claims.get("roles", []),
-                "scopes": claims.get("scp", "").split(" ") if "scp" in claims else [],
+                "scopes": token_scopes,
                 # Include tenant information for multi-tenant scenarios
                 "tenant_id": claims.get("tid"),  # The tenant ID that issued the token
                 "issuer": claims.get("iss")      # The full issuer URL
             }
             
-            return True, user_info, None
+            _cache_validated_token(cache_key, claims, user_info)
+            return True, dict(user_info), None
         except AuthError as e:
-            logging.error(f"Token validation error: {str(e)}")
+            _log.error("Token validation error: %s", e)
             return False, None, f"Token validation error: {str(e)}"
         except Exception as e:
-            logging.error(f"Error validating token: {str(e)}")
+            _log.error("Error validating token: %s", e)
             return False, None, f"Error validating token: {str(e)}"
 
 # Create a singleton authenticator
@@ -212,6 +332,32 @@ def get_authenticator():
         _authenticator = MicrosoftIdentityAuthenticator()
     return _authenticator
 
+# OBO credentials keyed by (tenant_id, user token hash), and the resource tokens acquired
+# with them keyed by (tenant_id, resource, user token hash) -> (access_token, expires_on)
+CREDENTIAL_CACHE_MAX_SIZE = 1024
+RESOURCE_TOKEN_CACHE_MAX_SIZE = 4096
+RESOURCE_TOKEN_REFRESH_MARGIN = 60  # seconds before expiry at which a cached resource token is re-acquired
+_credential_cache: Dict[Tuple[str, bytes], Any] = {}
+_resource_token_cache: Dict[Tuple[str, str, bytes], Tuple[str, int]] = {}
+
+def _get_cached_resource_token(cache_key: Optional[Tuple[str, str, bytes]]) -> Optional[str]:
+    """Get a cached resource token that isn't about to expire."""
+    entry = _resource_token_cache.get(cache_key) if cache_key else None
+    if entry and entry[1] - time.time() > RESOURCE_TOKEN_REFRESH_MARGIN:
+        return entry[0]
+    return None
+
+def _cache_resource_token(cache_key: Optional[Tuple[str, str, bytes]], token: Any) -> None:
+    """Cache a resource token (an azure.core AccessToken) until it nears expiry."""
+    if cache_key:
+        _bounded_set(_resource_token_cache, cache_key, (token.token, token.expires_on), RESOURCE_TOKEN_CACHE_MAX_SIZE)
+
+def _resource_token_key(resource: str, tenant_id: Optional[str], user_token: Optional[str]) -> Optional[Tuple[str, str, bytes]]:
+    """Build the resource token cache key, or None when there is no user token to act for."""
+    if not user_token:
+        return None
+    return tenant_id or get_home_tenant_id(), resource, _token_hash(user_token)
+
 def get_credential(tenant_id: Optional[str] = None, user_token: Optional[str] = None):
     """
     Get the appropriate credential for authenticating with Azure services.
@@ -232,15 +378,20 @@ def get_credential(tenant_id: Optional[str] = None, user_token: Optional[str] =
     try:
         from azure.identity import OnBehalfOfCredential
         
-        logging.info(f"Getting credential for tenant: {tenant_id or 'default'}, OBO: {bool(user_token)}")
+        _log.info("Getting credential for tenant: %s, OBO: %s", tenant_id or "default", bool(user_token))
         
         # If we have a user token, use OBO flow to preserve user identity
         if user_token:
+            cache_key = (tenant_id or get_home_tenant_id(), _token_hash(user_token))
+            cached_credential = _credential_cache.get(cache_key)
+            if cached_credential is not None:
+                return cached_credential
+            
             client_id = get_client_id()
             client_secret = get_client_secret()
             authority_host = f"https://login.microsoftonline.com/{tenant_id or get_home_tenant_id()}"
             
-            logging.info(f"Setting up OBO credential with authority: {authority_host}")
+            _log.info("Setting up OBO credential with authority: %s", authority_host)
             
             # Create On-Behalf-Of credential with the user token
             # This allows calls to Azure services to be made as the user, not as the Function App
@@ -252,18 +403,19 @@ def get_credential(tenant_id: Optional[str] = None, user_token: Optional[str] =
             )
             
             # Use OBO flow for accessing resources
+            _bounded_set(_credential_cache, cache_key, obo_credential, CREDENTIAL_CACHE_MAX_SIZE)
             return obo_credential
         
         # For all scenarios, we require a user token for OBO flow
         else:
             # Enforce OBO flow by requiring a user token
-            logging.error("Cannot create credential without user token - OBO flow is required")
+            _log.error("Cannot create credential without user token - OBO flow is required")
             raise ValueError("User token is required for authentication. All operations must use On-Behalf-Of flow.")
     except Exception as e:
-        logging.error(f"Failed to get credential: {str(e)}")
+        _log.error("Failed to get credential: %s", e)
         raise ValueError("Credential configuration error. Check your configuration for managed identity, OBO flow, or Azure Lighthouse delegations.")
 
-async def get_token_for_resource(
+def get_token_for_resource(
     resource: str, 
     tenant_id: Optional[str] = None,
     user_token: Optional[str] = None
@@ -286,28 +438,33 @@ async def get_token_for_resource(
     """
     try:
         # Get the appropriate credential based on tenant
-        logging.info(f"Getting async token for resource {resource} in tenant {tenant_id or 'default'}, OBO: {bool(user_token)}")
+        _log.info("Getting token for resource %s in tenant %s, OBO: %s", resource, tenant_id or "default", bool(user_token))
         
-        # If multi-tenant is enabled and a tenant ID is provided, verify it's either 
-        # the home tenant or one of the managed tenants
-        if is_multi_tenant_enabled() and tenant_id:
-            home_tenant_id = get_home_tenant_id()
-            managed_tenants = get_managed_tenant_ids()
-            
-            if tenant_id != home_tenant_id and tenant_id not in managed_tenants:
-                logging.error(f"Requested tenant {tenant_id} is not in the list of managed tenants")
+        # If multi-tenant is enabled, other tenants are only allowed with auto-discovery enabled.
+        # tenant_id is not checked against the user's token here; Azure AD refuses the OBO
+        # exchange if the user has no access to the requested tenant.
+        if is_multi_tenant_enabled() and tenant_id and tenant_id != get_home_tenant_id():
+            if not is_auto_tenant_discovery_enabled():
+                _log.error("Requested tenant %s is not authorized: tenant auto-discovery is disabled", tenant_id)
                 return None
                 
-            logging.info(f"Verified tenant {tenant_id} is authorized for access")
+            _log.info("Allowing cross-tenant token request for tenant %s (auto-discovery enabled)", tenant_id)
             
+        # Reuse a token acquired earlier for the same user while it is still valid
+        cache_key = _resource_token_key(resource, tenant_id, user_token)
+        cached_token = _get_cached_resource_token(cache_key)
+        if cached_token:
+            return cached_token
+        
         # Get credential with OBO flow if user token is provided
         credential = get_credential(tenant_id, user_token)
         
         # Request a token for the specified resource
         token = credential.get_token(resource)
+        _cache_resource_token(cache_key, token)
         return token.token
     except Exception as e:
-        logging.error(f"Failed to get token for resource {resource} in tenant {tenant_id or 'default'}: {str(e)}")
+        _log.error("Failed to get token for resource %s in tenant %s: %s", resource, tenant_id or "default", e)
         return None
 
 def get_graph_token(tenant_id: Optional[str] = None, user_token: Optional[str] = None) -> Optional[str]:
@@ -325,14 +482,7 @@ def get_graph_token(tenant_id: Optional[str] = None, user_token: Optional[str] =
     Returns:
         The Graph API access token or None if token acquisition fails
     """
-    try:
-        # Use the synchronous version directly instead of the async function
-        credential = get_credential(tenant_id, user_token)
-        token = credential.get_token("https://graph.microsoft.com/.default")
-        return token.token
-    except Exception as e:
-        logging.error(f"Failed to get Graph API token for tenant {tenant_id or 'default'}, OBO: {bool(user_token)}: {str(e)}")
-        return None
+    return get_token_for_resource(GRAPH_DEFAULT_SCOPE, tenant_id, user_token)
 
 def authenticate_request(req: func.HttpRequest) -> Tuple[bool, Optional[Dict[Any, Any]], Optional[str]]:
     """
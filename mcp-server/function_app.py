@@ -5,6 +5,13 @@ import os
 import datetime
 from typing import Dict, Any, List, Optional, Tuple
 import time
+import functools
+
+# orjson is optional; it parses request bodies and serializes response bodies considerably faster than json
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Import Microsoft Identity Web auth module
 from azure_auth import authenticate_request, get_graph_token
@@ -12,14 +19,29 @@ from azure_auth import authenticate_request, get_graph_token
 # Create a function app
 app = func.FunctionApp()
 
+# Maximum number of incidents a single incidents/batch-get request may ask for
+MAX_BATCH_INCIDENTS = 20
+
 # Azure APIs will have their versions defined directly in each function
 # This allows for more flexibility when different endpoints need different API versions
 
 # Utility functions for response formatting
+def dumps_body(obj: Any) -> bytes:
+    """Serialize a response body to JSON bytes, using orjson when it is available."""
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+def loads_body(req: func.HttpRequest) -> Any:
+    """Parse a JSON request body, using orjson on the raw bytes when it is available."""
+    if orjson:
+        return orjson.loads(req.get_body())
+    return req.get_json()
+
 def create_error_response(status_code: int, message: str) -> func.HttpResponse:
     """Create a standardized error response."""
     return func.HttpResponse(
-        body=json.dumps({"error": message}),
+        body=dumps_body({"error": message}),
         mimetype="application/json",
         status_code=status_code
     )
@@ -27,7 +49,7 @@ def create_error_response(status_code: int, message: str) -> func.HttpResponse:
 def create_success_response(data: Any) -> func.HttpResponse:
     """Create a standardized success response."""
     return func.HttpResponse(
-        body=json.dumps({"data": data}),
+        body=dumps_body({"data": data}),
         mimetype="application/json",
         status_code=200
     )
@@ -35,6 +57,17 @@ def create_success_response(data: Any) -> func.HttpResponse:
     payload = verify_token(token)
     return payload
 
+def require_auth(handler):
+    """Reject requests without a valid Azure AD token before running the route handler."""
+    @functools.wraps(handler)
+    def wrapper(req: func.HttpRequest) -> func.HttpResponse:
+        # Authenticate request using Azure AD
+        is_authenticated, _, error_message = authenticate_request(req)
+        if not is_authenticated:
+            return create_error_response(401, error_message or "Unauthorized")
+        return handler(req)
+    return wrapper
+
 @app.route(route="authenticate", auth_level=func.AuthLevel.ANONYMOUS, methods=["POST"])
 def authenticate(req: func.HttpRequest) -> func.HttpResponse:
     """Validate an Azure AD token and return user information."""
@@ -57,19 +90,14 @@ def authenticate(req: func.HttpRequest) -> func.HttpResponse:
         return create_error_response(500, f"Authentication error: {str(e)}")
 
 @app.route(route="incidents/list", auth_level=func.AuthLevel.ANONYMOUS, methods=["POST"])
+@require_auth
 def list_incidents(req: func.HttpRequest) -> func.HttpResponse:
     """List recent incidents from Azure Sentinel."""
     # API version specified directly in the function
     api_version = "2022-01-01-preview"  # Sentinel API version
     
-    # Authenticate request using Azure AD
-    is_authenticated, user_info, error_message = authenticate_request(req)
-    
-    if not is_authenticated:
-        return create_error_response(401, error_message or "Unauthorized")
-    
     try:
-        req_body = req.get_json()
+        req_body = loads_body(req)
         limit = req_body.get("limit", 10)
         filter_params = req_body.get("filter", {})
         
@@ -86,19 +114,14 @@ def list_incidents(req: func.HttpRequest) -> func.HttpResponse:
         return create_error_response(500, f"Error listing incidents: {str(e)}")
 
 @app.route(route="incidents/get", auth_level=func.AuthLevel.ANONYMOUS, methods=["POST"])
+@require_auth
 def get_incident(req: func.HttpRequest) -> func.HttpResponse:
     """Get a specific incident by ID."""
     # API version specified directly in the function
     api_version = "2022-01-01-preview"  # Sentinel API version
     
-    # Authenticate request using Azure AD
-    is_authenticated, user_info, error_message = authenticate_request(req)
-    
-    if not is_authenticated:
-        return create_error_response(401, error_message or "Unauthorized")
-    
     try:
-        req_body = req.get_json()
+        req_body = loads_body(req)
         incident_id = req_body.get("id")
         
         if not incident_id:
@@ -115,18 +138,40 @@ def get_incident(req: func.HttpRequest) -> func.HttpResponse:
         logging.error(f"Error getting incident: {str(e)}")
         return create_error_response(500, f"Error getting incident: {str(e)}")
 
+@app.route(route="incidents/batch-get", auth_level=func.AuthLevel.ANONYMOUS, methods=["POST"])
+@require_auth
+def batch_get_incidents(req: func.HttpRequest) -> func.HttpResponse:
+    """Get several incidents by ID in one request."""
+    # API version specified directly in the function
+    api_version = "2022-01-01-preview"  # Sentinel API version
+    
+    try:
+        req_body = loads_body(req)
+        incident_ids = req_body.get("ids")
+        
+        if not incident_ids or not isinstance(incident_ids, list):
+            return create_error_response(400, "A list of incident IDs is required")
+        if len(incident_ids) > MAX_BATCH_INCIDENTS:
+            return create_error_response(400, f"At most {MAX_BATCH_INCIDENTS} incidents can be requested at once")
+        
+        # In a production implementation, the Azure Sentinel API would be called here
+        # This would use the Azure SDK to make the call with proper credentials
+        
+        # For now, we'll return an informative message that the API integration is pending
+        return create_error_response(501, 
+            "Azure Sentinel API integration pending. This endpoint would retrieve the "
+            f"incidents with IDs: {', '.join(map(str, incident_ids))}, using API version: {api_version}")
+    except Exception as e:
+        logging.error(f"Error getting incidents: {str(e)}")
+        return create_error_response(500, f"Error getting incidents: {str(e)}")
+
 @app.route(route="metrics/dashboard", auth_level=func.AuthLevel.ANONYMOUS, methods=["POST"])
+@require_auth
 def get_metrics_dashboard(req: func.HttpRequest) -> func.HttpResponse:
     """Get security metrics dashboard data."""
     # API version specified directly in the function
     api_version = "2021-10-01"  # Defender API version for metrics
     
-    # Authenticate request using Azure AD
-    is_authenticated, user_info, error_message = authenticate_request(req)
-    
-    if not is_authenticated:
-        return create_error_response(401, error_message or "Unauthorized")
-    
     try:
         # In a production implementation, the Azure Defender API would be called here
         # This would use the Azure SDK to make the call with proper credentials
@@ -5,7 +5,9 @@ Utility functions for working with Azure Key Vault.
 import os
 import logging
 import functools
-from typing import Any, Optional, Dict
+import threading
+import time
+from typing import Any, Optional, Dict, Tuple, Iterable
 
 try:
     from azure.identity import ManagedIdentityCredential, DefaultAzureCredential
@@ -22,8 +24,36 @@ except ImportError:
 KEY_VAULT_NAME = os.environ.get("KEY_VAULT_NAME")
 USE_KEY_VAULT = os.environ.get("USE_KEY_VAULT", "true").lower() == "true"
 
-# Cache for Key Vault secrets
-_secret_cache: Dict[str, str] = {}
+# Cache for Key Vault secrets: name -> (expires_at, value). Secrets that don't exist
+# are cached as _MISSING so they aren't looked up again on every call.
+SECRET_CACHE_TTL = 300  # seconds
+SECRET_CACHE_MAX_SIZE = 256
+_MISSING = object()
+_secret_cache: Dict[str, Tuple[float, Any]] = {}
+_cache_lock = threading.RLock()
+# Per-secret locks so concurrent cache misses for one secret make a single Key Vault call
+_secret_locks: Dict[str, threading.Lock] = {}
+
+def _get_secret_lock(secret_name: str) -> threading.Lock:
+    """Get the lock that serializes Key Vault fetches of a secret."""
+    with _cache_lock:
+        return _secret_locks.setdefault(secret_name, threading.Lock())
+
+def _get_cached_secret(secret_name: str) -> Any:
+    """Get a cached secret value (or _MISSING), or None if it isn't cached or has expired."""
+    with _cache_lock:
+        entry = _secret_cache.get(secret_name)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        _secret_cache.pop(secret_name, None)
+        return None
+
+def _cache_secret(secret_name: str, value: Any) -> None:
+    """Cache a secret value (or _MISSING), evicting the oldest entry when the cache is full."""
+    with _cache_lock:
+        if secret_name not in _secret_cache and len(_secret_cache) >= SECRET_CACHE_MAX_SIZE:
+            _secret_cache.pop(next(iter(_secret_cache)))
+        _secret_cache[secret_name] = (time.monotonic() + SECRET_CACHE_TTL, value)
 
 @functools.lru_cache(maxsize=1)
 def get_key_vault_client() -> Optional[Any]:
@@ -53,7 +83,7 @@ def get_key_vault_client() -> Optional[Any]:
 def get_secret(secret_name: str, default_value: str = "") -> str:
     """
     Get a secret from Azure Key Vault.
-    Uses caching to avoid unnecessary API calls.
+    Values, and secrets found not to exist, are cached for SECRET_CACHE_TTL seconds.
     
     Args:
         secret_name: The name of the secret in Key Vault
@@ -63,8 +93,11 @@ def get_secret(secret_name: str, default_value: str = "") -> str:
         The secret value or the default value
     """
     # Check cache first
-    if secret_name in _secret_cache:
-        return _secret_cache[secret_name]
+    cached = _get_cached_secret(secret_name)
+    if cached is _MISSING:
+        return default_value
+    if cached is not None:
+        return cached
     
     # If Key Vault is not configured, return default
     if not USE_KEY_VAULT or not KEY_VAULT_NAME:
@@ -74,18 +107,53 @@ def get_secret(secret_name: str, default_value: str = "") -> str:
     if not client:
         return default_value
     
-    try:
-        # Get secret from Key Vault
-        secret = client.get_secret(secret_name)
-        # Cache the value
-        _secret_cache[secret_name] = secret.value
-        return secret.value
-    except ResourceNotFoundError:
-        logging.warning(f"Secret {secret_name} not found in Key Vault")
-        return default_value
-    except Exception as e:
-        logging.error(f"Error retrieving {secret_name} from Key Vault: {str(e)}")
-        return default_value
+    with _get_secret_lock(secret_name):
+        # Another thread may have fetched the secret while we waited for the lock
+        cached = _get_cached_secret(secret_name)
+        if cached is _MISSING:
+            return default_value
+        if cached is not None:
+            return cached
+        
+        try:
+            # Get secret from Key Vault
+            secret = client.get_secret(secret_name)
+            # Cache the value
+            _cache_secret(secret_name, secret.value)
+            return secret.value
+        except ResourceNotFoundError:
+            logging.warning(f"Secret {secret_name} not found in Key Vault")
+            _cache_secret(secret_name, _MISSING)
+            return default_value
+        except Exception as e:
+            logging.error(f"Error retrieving {secret_name} from Key Vault: {str(e)}")
+            return default_value
+
+def prefetch_secrets(secret_names: Iterable[str]) -> Optional[threading.Thread]:
+    """
+    Warm the Key Vault client and the secret cache in a background thread,
+    so the first request on a cold worker doesn't wait on Key Vault.
+    
+    Args:
+        secret_names: The names of the secrets to fetch
+        
+    Returns:
+        The started thread, or None if Key Vault is not configured
+    """
+    if not USE_KEY_VAULT or not KEY_VAULT_NAME or not SecretClient:
+        return None
+    
+    names = list(secret_names)
+    
+    def prefetch():
+        if not get_key_vault_client():
+            return
+        for secret_name in names:
+            get_secret(secret_name)
+    
+    thread = threading.Thread(target=prefetch, name="key-vault-prefetch", daemon=True)
+    thread.start()
+    return thread
 
 def set_secret(secret_name: str, secret_value: str) -> bool:
     """
@@ -109,7 +177,7 @@ def set_secret(secret_name: str, secret_value: str) -> bool:
         # Set secret in Key Vault
         client.set_secret(secret_name, secret_value)
         # Update cache
-        _secret_cache[secret_name] = secret_value
+        _cache_secret(secret_name, secret_value)
         return True
     except Exception as e:
         logging.error(f"Error setting {secret_name} in Key Vault: {str(e)}")
@@ -136,8 +204,8 @@ def delete_secret(secret_name: str) -> bool:
         # Delete secret from Key Vault
         client.begin_delete_secret(secret_name)
         # Remove from cache
-        if secret_name in _secret_cache:
-            del _secret_cache[secret_name]
+        with _cache_lock:
+            _secret_cache.pop(secret_name, None)
         return True
     except Exception as e:
         logging.error(f"Error deleting {secret_name} from Key Vault: {str(e)}")
@@ -145,4 +213,5 @@ def delete_secret(secret_name: str) -> bool:
 
 def clear_cache() -> None:
     """Clear the secret cache."""
-    _secret_cache.clear()
+    with _cache_lock:
+        _secret_cache.clear()
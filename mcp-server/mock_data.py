@@ -5,6 +5,7 @@ Mock data utilities for development and testing.
 import random
 import datetime
 from typing import Dict, Any, List
+import os
 import uuid
 
 # Mock incident severity levels
@@ -24,6 +25,19 @@ INCIDENT_TYPES = [
     "Brute force attack"
 ]
 
+# Dashboard severity order, with the mock incident count and MTTR (hours) ranges for each
+DASHBOARD_SEVERITIES = ("Critical", "High", "Medium", "Low")
+SEVERITY_COUNT_BOUNDS = ((5, 15), (15, 40), (30, 70), (40, 100))
+MTTR_BOUNDS = ((1, 8), (8, 24), (24, 72), (72, 168))
+
+# Mock assignees, with a 30% chance of an incident being unassigned
+MOCK_ASSIGNEES = ("unassigned",) + tuple(f"user{i}@example.com" for i in range(1, 6))
+MOCK_ASSIGNEE_WEIGHTS = (30, 14, 14, 14, 14, 14)
+MOCK_SUBSCRIPTIONS = tuple(f"subscription-{i}" for i in range(1, 6))
+
+# Mock incident timeline actions, in the order they happen
+TIMELINE_ACTIONS = ("Created", "StatusChanged", "CommentAdded", "AssigneeChanged")
+
 def generate_mock_incidents(limit: int = 10, filter_params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
     """
     Generate mock incident data for testing.
@@ -35,41 +49,58 @@ def generate_mock_incidents(limit: int = 10, filter_params: Dict[str, Any] = Non
     Returns:
         List of mock incidents
     """
+    # A non-positive limit yields no incidents
+    limit = max(limit, 0)
     filter_params = filter_params or {}
     severity = filter_params.get("severity")
     status = filter_params.get("status")
+    # Parse the date filters once rather than on every loop iteration
     date_from = filter_params.get("date_from")
+    date_from = datetime.datetime.fromisoformat(date_from) if date_from else None
     date_to = filter_params.get("date_to")
+    date_to = datetime.datetime.fromisoformat(date_to) if date_to else None
     
     incidents = []
     
+    # Sample the random fields for the whole batch up front, one call per field
+    severities = [severity] * limit if severity else random.choices(SEVERITY_LEVELS, k=limit)
+    statuses = [status] * limit if status else random.choices(INCIDENT_STATUSES, k=limit)
+    types = random.choices(INCIDENT_TYPES, k=limit)
+    assignees = random.choices(MOCK_ASSIGNEES, weights=MOCK_ASSIGNEE_WEIGHTS, k=limit)
+    resource_numbers = random.choices(range(1000, 10000), k=limit)
+    subscriptions = random.choices(MOCK_SUBSCRIPTIONS, k=limit)
+    # Random dates in the past 7 days; there are only eight, so build them once
+    days_ago = random.choices(range(8), k=limit)
+    now = datetime.datetime.now()
+    incident_dates = [now - datetime.timedelta(days=days) for days in range(8)]
+    created_dates = [date.isoformat() for date in incident_dates]
+    # One urandom read for all incident IDs instead of one per uuid4() call
+    id_bytes = os.urandom(16 * limit)
+    
     for i in range(limit):
-        # Generate random incident
-        incident_severity = severity or random.choice(SEVERITY_LEVELS)
-        incident_status = status or random.choice(INCIDENT_STATUSES)
-        
-        # Generate random date in the past 7 days
-        days_ago = random.randint(0, 7)
-        incident_date = datetime.datetime.now() - datetime.timedelta(days=days_ago)
+        incident_severity = severities[i]
+        incident_status = statuses[i]
+        incident_date = incident_dates[days_ago[i]]
         
         # Skip if doesn't match date filter
-        if date_from and incident_date < datetime.datetime.fromisoformat(date_from):
+        if date_from and incident_date < date_from:
             continue
-        if date_to and incident_date > datetime.datetime.fromisoformat(date_to):
+        if date_to and incident_date > date_to:
             continue
             
-        incident_id = str(uuid.uuid4())
+        incident_id = str(uuid.UUID(bytes=id_bytes[i * 16:(i + 1) * 16], version=4))
+        incident_type = types[i]
         
         incident = {
             "id": incident_id,
-            "title": f"{random.choice(INCIDENT_TYPES)} - {incident_id[:8]}",
+            "title": f"{incident_type} - {incident_id[:8]}",
             "severity": incident_severity,
             "status": incident_status,
-            "created": incident_date.isoformat(),
-            "assignedTo": "unassigned" if random.random() < 0.3 else f"user{random.randint(1, 5)}@example.com",
-            "type": random.choice(INCIDENT_TYPES),
-            "resourceName": f"vm-{random.randint(1000, 9999)}",
-            "subscriptionId": f"subscription-{random.randint(1, 5)}"
+            "created": created_dates[days_ago[i]],
+            "assignedTo": assignees[i],
+            "type": incident_type,
+            "resourceName": f"vm-{resource_numbers[i]}",
+            "subscriptionId": subscriptions[i]
         }
         
         incidents.append(incident)
@@ -86,15 +117,20 @@ def generate_mock_incident_detail(incident_id: str) -> Dict[str, Any]:
     Returns:
         Detailed incident information
     """
+    # All timestamps are offsets from a single snapshot of the current time
+    now = datetime.datetime.now()
+    timeline_length = random.randint(1, len(TIMELINE_ACTIONS))
+    incident_type = random.choice(INCIDENT_TYPES)
+    
     # Basic incident information
     incident = {
         "id": incident_id,
-        "title": f"{random.choice(INCIDENT_TYPES)} - {incident_id[:8]}",
+        "title": f"{incident_type} - {incident_id[:8]}",
         "severity": random.choice(SEVERITY_LEVELS),
         "status": random.choice(INCIDENT_STATUSES),
-        "created": (datetime.datetime.now() - datetime.timedelta(days=random.randint(0, 7))).isoformat(),
+        "created": (now - datetime.timedelta(days=random.randint(0, 7))).isoformat(),
         "assignedTo": "unassigned" if random.random() < 0.3 else f"user{random.randint(1, 5)}@example.com",
-        "type": random.choice(INCIDENT_TYPES),
+        "type": incident_type,
         "resourceName": f"vm-{random.randint(1000, 9999)}",
         "subscriptionId": f"subscription-{random.randint(1, 5)}",
         
@@ -102,11 +138,11 @@ def generate_mock_incident_detail(incident_id: str) -> Dict[str, Any]:
         "description": f"Detailed description for incident {incident_id[:8]}. This incident was detected by Azure Sentinel based on anomalous activity patterns.",
         "alertsCount": random.randint(1, 10),
         "entitiesCount": random.randint(1, 20),
-        "lastActivityTime": (datetime.datetime.now() - datetime.timedelta(hours=random.randint(1, 48))).isoformat(),
+        "lastActivityTime": (now - datetime.timedelta(hours=random.randint(1, 48))).isoformat(),
         "owner": {
             "name": f"User {random.randint(1, 5)}",
             "email": f"user{random.randint(1, 5)}@example.com",
-            "assignedTime": (datetime.datetime.now() - datetime.timedelta(hours=random.randint(1, 24))).isoformat()
+            "assignedTime": (now - datetime.timedelta(hours=random.randint(1, 24))).isoformat()
         },
         "relatedResources": [
             {
@@ -121,26 +157,26 @@ def generate_mock_incident_detail(incident_id: str) -> Dict[str, Any]:
                 "id": f"alert-{random.randint(1000, 9999)}",
                 "name": f"Alert {i+1} for {incident_id[:8]}",
                 "severity": random.choice(SEVERITY_LEVELS),
-                "time": (datetime.datetime.now() - datetime.timedelta(hours=random.randint(1, 48))).isoformat()
+                "time": (now - datetime.timedelta(hours=random.randint(1, 48))).isoformat()
             }
             for i in range(random.randint(1, 5))
         ],
         "timeline": [
             {
-                "time": (datetime.datetime.now() - datetime.timedelta(hours=hours)).isoformat(),
+                "time": (now - datetime.timedelta(hours=hours)).isoformat(),
                 "action": action,
                 "user": f"user{random.randint(1, 5)}@example.com" if action != "Created" else "System"
             }
-            for hours, action in sorted([(random.randint(1, 48), action) for action in
-                                        ["Created", "StatusChanged", "CommentAdded", "AssigneeChanged"][:random.randint(1, 4)]], 
-                                        key=lambda x: x[0], reverse=True)
+            # Distinct offsets sorted oldest first, so the actions stay in order
+            for hours, action in zip(sorted(random.sample(range(1, 49), timeline_length), reverse=True),
+                                     TIMELINE_ACTIONS[:timeline_length])
         ],
         "comments": [
             {
                 "id": f"comment-{random.randint(1000, 9999)}",
                 "user": f"user{random.randint(1, 5)}@example.com",
                 "text": f"Comment {i+1} on incident {incident_id[:8]}",
-                "time": (datetime.datetime.now() - datetime.timedelta(hours=random.randint(1, 48))).isoformat()
+                "time": (now - datetime.timedelta(hours=random.randint(1, 48))).isoformat()
             }
             for i in range(random.randint(0, 3))
         ],
@@ -161,48 +197,36 @@ def generate_mock_metrics_dashboard() -> Dict[str, Any]:
     Returns:
         Dict containing security metrics data
     """
-    current_month = datetime.datetime.now().month
-    current_year = datetime.datetime.now().year
+    now = datetime.datetime.now()
+    current_month = now.month
+    current_year = now.year
     
     # Generate data for the last 30 days
     days = 30
-    date_points = [(datetime.datetime.now() - datetime.timedelta(days=i)).strftime("%Y-%m-%d") 
-                  for i in range(days)]
-    date_points.reverse()
+    date_points = [(now - datetime.timedelta(days=i)).strftime("%Y-%m-%d")
+                  for i in range(days - 1, -1, -1)]
     
     # Generate some trend data
-    incident_trend = [random.randint(3, 15) for _ in range(days)]
-    severity_counts = {
-        "Critical": random.randint(5, 15),
-        "High": random.randint(15, 40),
-        "Medium": random.randint(30, 70),
-        "Low": random.randint(40, 100)
-    }
+    incident_trend = random.choices(range(3, 16), k=days)
+    # Per-severity values follow DASHBOARD_SEVERITIES order
+    severity_counts = [random.randint(low, high) for low, high in SEVERITY_COUNT_BOUNDS]
     
     # Calculate some derived metrics
-    total_incidents = sum(severity_counts.values())
-    incident_by_type = {
-        incident_type: random.randint(10, 50) 
-        for incident_type in INCIDENT_TYPES
-    }
+    total_incidents = sum(severity_counts)
+    incident_by_type = dict(zip(INCIDENT_TYPES, random.choices(range(10, 51), k=len(INCIDENT_TYPES))))
     
     top_resources = [
         {
             "name": f"resource-{i}",
-            "count": random.randint(5, 25)
+            "count": count
         }
-        for i in range(1, 6)
+        for i, count in enumerate(random.choices(range(5, 26), k=5), start=1)
     ]
     
     top_resources.sort(key=lambda x: x["count"], reverse=True)
     
     # Generate MTTR (Mean Time To Resolution) in hours for each severity
-    mttr_by_severity = {
-        "Critical": round(random.uniform(1, 8), 1),
-        "High": round(random.uniform(8, 24), 1),
-        "Medium": round(random.uniform(24, 72), 1),
-        "Low": round(random.uniform(72, 168), 1)
-    }
+    mttr_by_severity = [round(random.uniform(low, high), 1) for low, high in MTTR_BOUNDS]
     
     dashboard = {
         "summary": {
@@ -211,15 +235,15 @@ def generate_mock_metrics_dashboard() -> Dict[str, Any]:
             "resolvedLast24h": random.randint(5, 20),
             "newLast24h": random.randint(5, 25),
             "meanTimeToResolution": round(random.uniform(10, 48), 1),  # hours
-            "criticalIncidents": severity_counts["Critical"]
+            "criticalIncidents": severity_counts[0]
         },
         "trend": {
             "dates": date_points,
             "incidents": incident_trend
         },
         "severityDistribution": {
-            "labels": list(severity_counts.keys()),
-            "values": list(severity_counts.values())
+            "labels": list(DASHBOARD_SEVERITIES),
+            "values": severity_counts
         },
         "incidentsByType": {
             "labels": list(incident_by_type.keys()),
@@ -227,12 +251,12 @@ def generate_mock_metrics_dashboard() -> Dict[str, Any]:
         },
         "topAffectedResources": top_resources,
         "resolutionTimes": {
-            "labels": list(mttr_by_severity.keys()),
-            "values": list(mttr_by_severity.values())
+            "labels": list(DASHBOARD_SEVERITIES),
+            "values": mttr_by_severity
         },
         "statusDistribution": {
             "labels": INCIDENT_STATUSES,
-            "values": [random.randint(10, 50) for _ in INCIDENT_STATUSES]
+            "values": random.choices(range(10, 51), k=len(INCIDENT_STATUSES))
         }
     }
     
@@ -6,6 +6,9 @@ This runs when the function app starts and validates configuration.
 import os
 import logging
 import sys
+import threading
+from dataclasses import dataclass
+from typing import Optional
 
 # Try to import Azure modules
 try:
@@ -22,15 +25,66 @@ try:
 except ImportError:
     HAS_KEY_VAULT_UTILS = False
 
-def validate_configuration():
-    """Validate the function app configuration."""
+@dataclass(frozen=True)
+class StartupConfig:
+    """Startup settings, read from the environment once at import."""
+    is_azure_functions: bool
+    key_vault_name: Optional[str]
+    use_key_vault: bool
+    tenant_id: Optional[str]
+    
+    @classmethod
+    def from_env(cls) -> "StartupConfig":
+        """Build the startup settings from environment variables."""
+        return cls(
+            is_azure_functions=os.environ.get("FUNCTIONS_WORKER_RUNTIME") is not None,
+            key_vault_name=os.environ.get("KEY_VAULT_NAME"),
+            use_key_vault=os.environ.get("USE_KEY_VAULT", "true").lower() == "true",
+            tenant_id=os.environ.get("AZURE_TENANT_ID"),
+        )
+
+STARTUP_CONFIG = StartupConfig.from_env()
+
+def probe_key_vault():
+    """Check that Key Vault is reachable and holds the tenant ID secret."""
+    try:
+        client = get_key_vault_client()
+        if client:
+            # Try to get a test secret to validate access; this warms the secret cache too
+            tenant_id = get_secret("azure-home-tenant-id")
+            if tenant_id:
+                logging.info("Successfully connected to Key Vault and retrieved secrets")
+            else:
+                logging.warning("Connected to Key Vault but could not retrieve required secrets")
+        else:
+            logging.warning("Failed to create Key Vault client")
+    except Exception as e:
+        logging.error(f"Error accessing Key Vault: {str(e)}")
+
+def validate_configuration(config: StartupConfig = STARTUP_CONFIG,
+                           background: bool = True) -> Optional[threading.Thread]:
+    """
+    Validate the function app configuration.
+    
+    The Key Vault check is a network round trip, so for importers it runs in a
+    background thread rather than holding up a cold start.
+    
+    Args:
+        config: The startup settings to validate
+        background: Run the Key Vault check in a background thread; when False
+            (as when run as a script) it runs inline before returning
+    
+    Returns:
+        The Key Vault probe thread, or None if no background probe was started
+    """
+    probe_thread = None
     # Check if running in Azure Functions
-    is_azure_functions = os.environ.get("FUNCTIONS_WORKER_RUNTIME") is not None
+    is_azure_functions = config.is_azure_functions
     logging.info(f"Running in Azure Functions environment: {is_azure_functions}")
     
     # Log authentication flow information
     logging.info("Authentication Flow:")
-    logging.info("1. Users authenticate via Azure CLI (az login)")
+    logging.info("1. Users sign in through the CLI client (MSAL interactive browser sign-in)")
     logging.info("2. User tokens are passed to this Function App")
     logging.info("3. Function App validates user tokens")
     logging.info("4. Function App uses its managed identity for Azure service access")
@@ -43,8 +97,8 @@ def validate_configuration():
         logging.warning("Not running in Azure Functions - managed identity unavailable")
     
     # Check if Key Vault is configured
-    key_vault_name = os.environ.get("KEY_VAULT_NAME")
-    use_key_vault = os.environ.get("USE_KEY_VAULT", "true").lower() == "true"
+    key_vault_name = config.key_vault_name
+    use_key_vault = config.use_key_vault
     
     if use_key_vault and not key_vault_name:
         logging.warning("USE_KEY_VAULT is true but KEY_VAULT_NAME is not set")
@@ -52,26 +106,17 @@ def validate_configuration():
     if use_key_vault and key_vault_name:
         logging.info(f"Key Vault configuration: {key_vault_name}")
         
-        # Check if we can access Key Vault
-        if HAS_AZURE_MODULES and HAS_KEY_VAULT_UTILS:
-            try:
-                client = get_key_vault_client()
-                if client:
-                    # Try to get a test secret to validate access
-                    tenant_id = get_secret("azure-tenant-id")
-                    if tenant_id:
-                        logging.info("Successfully connected to Key Vault and retrieved secrets")
-                    else:
-                        logging.warning("Connected to Key Vault but could not retrieve required secrets")
-                else:
-                    logging.warning("Failed to create Key Vault client")
-            except Exception as e:
-                logging.error(f"Error accessing Key Vault: {str(e)}")
-        else:
+        # Check if we can access Key Vault; outside Azure Functions there is no managed identity to check with
+        if not HAS_AZURE_MODULES or not HAS_KEY_VAULT_UTILS:
             logging.warning("Azure modules or Key Vault utilities not available")
+        elif is_azure_functions and background:
+            probe_thread = threading.Thread(target=probe_key_vault, name="key-vault-probe", daemon=True)
+            probe_thread.start()
+        elif is_azure_functions:
+            probe_key_vault()
     
     # Check required configuration
-    tenant_id = os.environ.get("AZURE_TENANT_ID")
+    tenant_id = config.tenant_id
     if not tenant_id and (not use_key_vault or not key_vault_name):
         logging.warning("AZURE_TENANT_ID is not set and not using Key Vault")
     
@@ -84,11 +129,14 @@ def validate_configuration():
             logging.info("Managed Identity credential created successfully")
         except Exception as e:
             logging.error(f"Error creating Managed Identity credential: {str(e)}")
+    
+    return probe_thread
 
 def main():
     """Main entry point for the startup script."""
     logging.info("Starting MCP Server function app")
-    validate_configuration()
+    # The script exits when main() returns, so the Key Vault check runs inline
+    validate_configuration(background=False)
     logging.info("MCP Server function app startup complete")
 
 # Run the startup script
@@ -0,0 +1,88 @@
+"""
+Tests for the function app's HTTP routes.
+
+Run from the mcp-server directory with: python -m unittest discover -s tests
+Requires azure-functions; authentication is stubbed out.
+"""
+
+import os
+import sys
+import json
+import types
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import azure.functions as func
+
+# Stub the auth module so the routes can be called without Azure AD or Key Vault
+_fake_auth = types.ModuleType("azure_auth")
+_fake_auth.authenticated = True
+_fake_auth.authenticate_request = lambda req: (
+    (True, {"user": {"name": "Test User"}}, None) if _fake_auth.authenticated else (False, None, "Invalid token")
+)
+_fake_auth.get_graph_token = lambda *args, **kwargs: None
+sys.modules["azure_auth"] = _fake_auth
+
+import function_app
+
+
+def call_route(route, body):
+    """Call a route's handler with a JSON POST body and return (status_code, parsed body)."""
+    handler = route.build().get_user_function()
+    req = func.HttpRequest(
+        method="POST",
+        url="/api/test",
+        headers={"Authorization": "Bearer test-token"},
+        body=json.dumps(body).encode()
+    )
+    response = handler(req)
+    return response.status_code, json.loads(response.get_body())
+
+
+class BatchGetIncidentsTests(unittest.TestCase):
+    """incidents/batch-get validates the ids list and handles every ID it is given."""
+
+    def setUp(self):
+        _fake_auth.authenticated = True
+
+    def test_each_requested_id_is_handled(self):
+        ids = ["incident-1", "incident-2", "incident-3"]
+        status, body = call_route(function_app.batch_get_incidents, {"ids": ids})
+        # The Sentinel integration is pending, so the route reports which incidents it would fetch
+        self.assertEqual(status, 501)
+        for incident_id in ids:
+            self.assertIn(incident_id, body["error"])
+
+    def test_missing_ids_is_rejected(self):
+        status, body = call_route(function_app.batch_get_incidents, {})
+        self.assertEqual(status, 400)
+        self.assertIn("list of incident IDs", body["error"])
+
+    def test_ids_must_be_a_list(self):
+        status, _ = call_route(function_app.batch_get_incidents, {"ids": "incident-1"})
+        self.assertEqual(status, 400)
+
+    def test_empty_ids_is_rejected(self):
+        status, _ = call_route(function_app.batch_get_incidents, {"ids": []})
+        self.assertEqual(status, 400)
+
+    def test_too_many_ids_is_rejected(self):
+        ids = [f"incident-{i}" for i in range(function_app.MAX_BATCH_INCIDENTS + 1)]
+        status, body = call_route(function_app.batch_get_incidents, {"ids": ids})
+        self.assertEqual(status, 400)
+        self.assertIn(str(function_app.MAX_BATCH_INCIDENTS), body["error"])
+
+    def test_max_batch_is_accepted(self):
+        ids = [f"incident-{i}" for i in range(function_app.MAX_BATCH_INCIDENTS)]
+        status, _ = call_route(function_app.batch_get_incidents, {"ids": ids})
+        self.assertEqual(status, 501)
+
+    def test_unauthenticated_request_is_rejected(self):
+        _fake_auth.authenticated = False
+        status, _ = call_route(function_app.batch_get_incidents, {"ids": ["incident-1"]})
+        self.assertEqual(status, 401)
+
+
+if __name__ == "__main__":
+    unittest.main()